@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+from telebot import TeleBot
+
+from conditional import conditional_headers
+from delivery import DeliveryQueue
+from exceptions import (
+    APIThrottledError,
+    RequestExceptionError,
+    ResponseStatusError,
+    TimestampError,
+)
+from homework import (
+    ENDPOINT,
+    HEADERS,
+    decode_api_response,
+    load_environment,
+    make_headers,
+    report_error,
+    validate_response,
+)
+from json_codec import loads
+from log_config import setup_logging
+from metrics import (
+    ACTIVE_SUBSCRIPTIONS,
+    API_REQUEST_SECONDS,
+    DELIVERY_QUEUE_DEPTH,
+    POLLS,
+    start_metrics_server,
+)
+from scheduler import Scheduler, load_runtime, process_response
+from state import open_state_store
+from tracing import TRACER
+from transport import THROTTLE_STATUS_CODES, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 100))
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', 30))
+
+
+async def async_get_api_answer(
+    session, timestamp, headers=HEADERS, endpoint=ENDPOINT, validator=None
+):
+    """Асинхронный аналог `get_api_answer`."""
+    if not isinstance(timestamp, int) or timestamp < 0:
+        raise TimestampError('Введено некорректное значение метки времени.')
+
+    payload = {'from_date': timestamp}
+
+    POLLS.inc()
+    started = time.perf_counter()
+    try:
+        with TRACER.span('http'):
+            async with session.get(
+                endpoint, headers=conditional_headers(headers, validator),
+                params=payload
+            ) as homework_statuses:
+                status_code = homework_statuses.status
+                response_headers = homework_statuses.headers
+                body = await homework_statuses.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise RequestExceptionError(
+            f'Ошибка при запросе к основному API: {error!r}'
+        ) from error
+    finally:
+        API_REQUEST_SECONDS.observe(time.perf_counter() - started)
+
+    if status_code in THROTTLE_STATUS_CODES:
+        raise APIThrottledError(
+            f'API просит повторить запрос позже. Код ответа API: '
+            f'{status_code}',
+            status_code,
+            parse_retry_after(response_headers.get('Retry-After'))
+        )
+    unchanged = validate_response(
+        validator, status_code, response_headers, body
+    )
+    if unchanged is not None:
+        return unchanged
+    if status_code != 200:
+        raise ResponseStatusError(
+            f'API возвращает код, отличный от 200.'
+            f'Код ответа API: {status_code}',
+            status_code
+        )
+
+    return decode_api_response(loads, body)
+
+
+class AsyncPoller:
+    """
+    Асинхронный цикл опроса подписок.
+    Число одновременных запросов к API ограничено семафором,
+    порядок опроса задаёт общий `Scheduler`.
+    """
+
+    def __init__(
+        self, bot, scheduler, session,
+        concurrency=POLL_CONCURRENCY, endpoint=ENDPOINT
+    ):
+        self.bot = bot
+        self.scheduler = scheduler
+        self.session = session
+        self.endpoint = endpoint
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll(self, subscription):
+        """
+        Опрашивает API для одной подписки.
+        Возвращает возникшую ошибку или None.
+        """
+        with TRACER.subscription(subscription.id):
+            return await self._poll(subscription)
+
+    async def _poll(self, subscription):
+        async with self._semaphore:
+            try:
+                response = await async_get_api_answer(
+                    self.session,
+                    subscription.cursor,
+                    headers=make_headers(subscription.token),
+                    endpoint=self.endpoint,
+                    validator=subscription.validator,
+                )
+            except Exception as error:
+                await asyncio.to_thread(
+                    report_error, self.bot, subscription, error
+                )
+                return error
+        try:
+            await asyncio.to_thread(
+                process_response, self.bot, subscription, response
+            )
+        except Exception as error:
+            await asyncio.to_thread(
+                report_error, self.bot, subscription, error
+            )
+            return error
+        return None
+
+    async def run_pending(self, now=None):
+        """Параллельно опрашивает подписки, срок опроса которых наступил."""
+        now = time.monotonic() if now is None else now
+        limit = self.scheduler.admit(now)
+        if limit == 0:
+            return 0
+        due_subscriptions = self.scheduler.pop_due(now, limit)
+        errors = await asyncio.gather(*(
+            self.poll(subscription) for subscription, _ in due_subscriptions
+        ))
+        for error in errors:
+            self.scheduler.record_result(error, now)
+        for subscription, due in due_subscriptions:
+            self.scheduler.complete(subscription, due, now)
+        return len(due_subscriptions)
+
+    async def run_forever(self):
+        """Бесконечный асинхронный цикл опроса подписок."""
+        while True:
+            await self.run_pending()
+            await asyncio.to_thread(self.scheduler.wait)
+
+
+def create_session(concurrency=POLL_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Функция создаёт HTTP-сессию aiohttp для опроса API."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+async def main_async():
+    """Асинхронный запуск опроса всех подписок."""
+    runtime = load_runtime()
+    if runtime is None:
+        return
+    telegram_token, registry = runtime
+
+    bot = TeleBot(token=telegram_token)
+    logger.info('Запущен асинхронный опрос подписок: %d.', len(registry))
+    with open_state_store() as store, DeliveryQueue(bot) as outbox:
+        ACTIVE_SUBSCRIPTIONS.set_function(registry.__len__)
+        DELIVERY_QUEUE_DEPTH.set_function(outbox.__len__)
+        scheduler = Scheduler(outbox, registry, store=store)
+        async with create_session() as session:
+            await AsyncPoller(outbox, scheduler, session).run_forever()
+
+
+if __name__ == '__main__':
+    load_environment()
+    setup_logging()
+    start_metrics_server()
+    asyncio.run(main_async())
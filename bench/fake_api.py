@@ -0,0 +1,237 @@
+"""
+Заглушки API Практикума и Bot API для бенчмарков и нагрузочных тестов.
+
+Заглушку Практикума по сценарию нагрузки можно запустить отдельно:
+    python -m bench.fake_api --workload bench/scenarios/incident.json
+
+Формат сценария описан в `bench.workload`.
+"""
+import argparse
+import json
+import re
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench.workload import Workload, load_workload
+
+STATUS_CYCLE = ('reviewing', 'rejected', 'reviewing', 'approved')
+HOMEWORK_NAME_PATTERN = re.compile(r'"(hw-[^"]+)"')
+
+
+class FakeServer(ThreadingHTTPServer):
+    """HTTP-сервер заглушки, работающий в фоновом потоке."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Обработчик с keep-alive, отвечающий JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_json(self, data, status=200):
+        """Отправляет ответ в формате JSON."""
+        self.send_body(json.dumps(data, ensure_ascii=False).encode(), status)
+
+    def send_body(self, body, status=200, headers=None):
+        """Отправляет готовое тело ответа с JSON-заголовками."""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Отключает журнал запросов."""
+
+
+class PracticumHandler(JSONHandler):
+    """
+    Заглушка `homework_statuses`.
+    Со сценарием нагрузки ответ строит `Workload`. Без него у каждого
+    токена одна работа, статус которой меняется каждые `change_every`
+    опросов; в ответ попадает только изменение.
+    """
+
+    def do_GET(self):
+        """Отвечает на запрос статусов работ."""
+        server = self.server
+        token = self.headers.get('Authorization', '').split(' ')[-1]
+        with server.lock:
+            polls = server.polls.get(token, 0) + 1
+            server.polls[token] = polls
+        if server.workload is not None:
+            self.respond_with_workload(token)
+            return
+        homeworks = []
+        if (polls - 1) % server.change_every == 0:
+            status = STATUS_CYCLE[
+                (polls - 1) // server.change_every % len(STATUS_CYCLE)
+            ]
+            name = f'hw-{token}'
+            homeworks.append({
+                'id': abs(hash(token)),
+                'homework_name': name,
+                'status': status,
+                'reviewer_comment': '',
+                'date_updated': '2024-01-01T00:00:00Z',
+                'lesson_name': 'bench',
+            })
+            server.changed_at[name] = time.monotonic()
+        self.send_json({
+            'homeworks': homeworks,
+            'current_date': int(time.time()),
+        })
+
+    def respond_with_workload(self, token):
+        """Отвечает по сценарию нагрузки, выдерживая его задержку."""
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            from_date = int(query.get('from_date', ['0'])[0])
+        except ValueError:
+            from_date = 0
+        status, headers, body, delay = self.server.workload.respond(
+            token, from_date
+        )
+        if delay:
+            time.sleep(delay)
+        self.send_body(body, status, headers)
+
+
+class TelegramHandler(JSONHandler):
+    """Заглушка Bot API: `sendMessage` и статистика задержек доставки."""
+
+    def do_GET(self):
+        """Отдаёт статистику или обрабатывает метод Bot API."""
+        path = urlparse(self.path).path
+        if path == '/stats':
+            self.send_json(self.server.practicum.stats())
+            return
+        self.handle_method()
+
+    def do_POST(self):
+        """Обрабатывает метод Bot API."""
+        self.handle_method()
+
+    def handle_method(self):
+        """Принимает сообщение и отвечает как `sendMessage`."""
+        query = parse_qs(urlparse(self.path).query)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            query.update(parse_qs(self.rfile.read(length).decode()))
+        text = query.get('text', [''])[0]
+        chat_id = query.get('chat_id', ['0'])[0]
+        self.server.practicum.record_delivery(text)
+        self.send_json({
+            'ok': True,
+            'result': {
+                'message_id': 1,
+                'date': int(time.time()),
+                'chat': {'id': int(chat_id), 'type': 'private'},
+                'text': text,
+            },
+        })
+
+
+class FakePracticum(FakeServer):
+    """Сервер-заглушка Практикума, хранящий моменты изменения статусов."""
+
+    def __init__(
+        self, address=('127.0.0.1', 0), change_every=2, workload=None
+    ):
+        super().__init__(address, PracticumHandler)
+        self.change_every = change_every
+        self.workload = workload
+        self.lock = threading.Lock()
+        self.polls = {}
+        self.changed_at = {} if workload is None else workload.changed_at
+        self.latencies = []
+
+    def record_delivery(self, text):
+        """Считает задержку от изменения статуса до доставки сообщения."""
+        now = time.monotonic()
+        for name in HOMEWORK_NAME_PATTERN.findall(text):
+            changed_at = self.changed_at.get(name)
+            if changed_at is not None:
+                self.latencies.append(now - changed_at)
+
+    def stats(self):
+        """Возвращает число опросов и перцентили задержки доставки."""
+        latencies = sorted(self.latencies)
+        result = {
+            'polls': sum(self.polls.values()),
+            'deliveries': len(latencies),
+            'latency_p50': None,
+            'latency_p99': None,
+        }
+        if self.workload is not None:
+            result['faults'] = dict(self.workload.injected)
+        if latencies:
+            result['latency_p50'] = statistics.median(latencies)
+            result['latency_p99'] = latencies[
+                min(int(len(latencies) * 0.99), len(latencies) - 1)
+            ]
+        return result
+
+
+class FakeTelegram(FakeServer):
+    """Сервер-заглушка Bot API, передающий доставки в `FakePracticum`."""
+
+    def __init__(self, practicum, address=('127.0.0.1', 0)):
+        super().__init__(address, TelegramHandler)
+        self.practicum = practicum
+
+
+def serve(ready, change_every=2, workload=None):
+    """
+    Запускает обе заглушки и сообщает их адреса через `ready`.
+    `workload` - словарь сценария нагрузки или None.
+    """
+    practicum = FakePracticum(
+        change_every=change_every,
+        workload=None if workload is None else Workload(workload),
+    ).start()
+    telegram = FakeTelegram(practicum).start()
+    ready.send((practicum.url, telegram.url))
+    threading.Event().wait()
+
+
+def main():
+    """Запускает заглушку Практикума по сценарию до прерывания."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workload', required=True, help='файл сценария')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    practicum = FakePracticum(
+        (args.host, args.port), workload=Workload(load_workload(args.workload))
+    ).start()
+    print(f'{practicum.url}/api/user_api/homework_statuses/', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(json.dumps(practicum.stats(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Бенчмарк конвейера опрос -> разбор -> уведомление.
+
+Запуск из корня репозитория:
+    python -m bench.run --subscriptions 1,100,10000 --rounds 3
+
+Заглушки API Практикума и Telegram работают в отдельном процессе,
+поэтому процессорное время бота считается без них. С `--workload`
+заглушка Практикума отвечает по сценарию нагрузки (см. `bench.workload`),
+а число подписок по умолчанию берётся из его `students`:
+    python -m bench.run --workload bench/scenarios/incident.json
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import sys
+import time
+import timeit
+import tracemalloc
+
+import requests
+from telebot import TeleBot, apihelper
+
+import homework
+from bench.fake_api import serve
+from bench.workload import load_workload
+from conditional import ResponseValidator
+from delivery import DeliveryQueue
+from json_codec import decode_response
+from scheduler import poll_subscription
+from subscriptions import Subscription, SubscriptionRegistry
+from transport import HTTPTransport
+
+TELEGRAM_TOKEN = '1234:bench'
+UNLIMITED_RATE = 10 ** 6
+HOMEWORKS_PER_RESPONSE = 500
+
+
+def start_fake_servers(change_every, workload=None):
+    """Запускает заглушки в дочернем процессе и возвращает их адреса."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, args=(child, change_every, workload), daemon=True
+    )
+    process.start()
+    practicum_url, telegram_url = parent.recv()
+    return process, practicum_url, telegram_url
+
+
+def build_registry(size):
+    """Создаёт реестр из `size` подписок."""
+    registry = SubscriptionRegistry()
+    for index in range(size):
+        registry.add(f'token{index}', str(index + 1), cursor=0)
+    return registry
+
+
+def poll_round(bot, registry, transport):
+    """Опрашивает каждую подписку реестра один раз, возвращает число сбоев."""
+    errors = 0
+    for subscription in registry:
+        if poll_subscription(bot, subscription, transport) is not None:
+            errors += 1
+    return errors
+
+
+def run_pipeline(size, rounds, change_every=2, workload=None):
+    """
+    Функция прогоняет `rounds` полных кругов опроса `size` подписок.
+    `workload` - словарь сценария нагрузки для заглушки Практикума.
+    Возвращает словарь с результатами замеров.
+    """
+    process, practicum_url, telegram_url = start_fake_servers(
+        change_every, workload
+    )
+    endpoint = homework.ENDPOINT
+    homework.ENDPOINT = f'{practicum_url}/api/user_api/homework_statuses/'
+    apihelper.API_URL = f'{telegram_url}/bot{{0}}/{{1}}'
+    try:
+        bot = TeleBot(token=TELEGRAM_TOKEN)
+        outbox = DeliveryQueue(
+            bot, global_rate=UNLIMITED_RATE, chat_rate=UNLIMITED_RATE
+        ).start()
+        with HTTPTransport(pool_maxsize=4) as transport:
+            poll_subscription(outbox, Subscription('warmup', '1'), transport)
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            registry = build_registry(size)
+            errors = poll_round(outbox, registry, transport)
+            gc.collect()
+            memory = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+            for _ in range(rounds):
+                errors += poll_round(outbox, registry, transport)
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            outbox.stop(timeout=60)
+            stats = transport.stats()
+        fake_stats = requests.get(f'{telegram_url}/stats').json()
+    finally:
+        homework.ENDPOINT = endpoint
+        apihelper.API_URL = None
+        process.terminate()
+
+    polls = size * rounds
+    return {
+        'subscriptions': size,
+        'polls': polls,
+        'polls_per_sec': polls / elapsed,
+        'cpu_per_poll_ms': cpu / polls * 1000,
+        'memory_per_subscription_bytes': memory / size,
+        'latency_p50_ms': _ms(fake_stats['latency_p50']),
+        'latency_p99_ms': _ms(fake_stats['latency_p99']),
+        'deliveries': fake_stats['deliveries'],
+        'connections_reused': stats['reused'],
+        'errors': errors,
+        'faults': fake_stats.get('faults'),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+class StaticResponse:
+    """Ответ заглушки API с готовым телом."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+
+class StaticTransport:
+    """Транспорт, отдающий на каждый запрос один и тот же ответ."""
+
+    def __init__(self, content):
+        self.response = StaticResponse(content)
+
+    def get(self, url, headers=None, params=None):
+        """Возвращает заготовленный ответ."""
+        return self.response
+
+
+def run_micro(number=1000, size=HOMEWORKS_PER_RESPONSE):
+    """
+    Замеряет функции конвейера, которые вызывает бот.
+    Ответ API содержит `size` работ и разбирается из байтов
+    тем же путём, что и при опросе, но без сети. `request_changed`
+    и `request_unchanged` - тот же запрос с условной проверкой ответа,
+    который изменился или совпал с прошлым.
+    """
+    homework_data = {
+        'id': 1,
+        'homework_name': 'hw.zip',
+        'status': 'approved',
+        'reviewer_comment': '',
+        'date_updated': '2024-01-01T00:00:00Z',
+        'lesson_name': 'bench',
+    }
+    response = {
+        'homeworks': [dict(homework_data, id=index) for index in range(size)],
+        'current_date': 1,
+    }
+    body = json.dumps(response, ensure_ascii=False).encode()
+    transport = StaticTransport(body)
+    unchanged = ResponseValidator(enabled=True)
+    unchanged.check(200, {}, body)
+    unchanged.commit()
+
+    class NullBot:
+        def send_message(self, chat_id=None, text=None):
+            """Ничего не отправляет."""
+
+    bot = NullBot()
+    cases = {
+        'check_response': lambda: homework.check_response(response),
+        'parse_status': lambda: homework.parse_status(homework_data),
+        'deliver_message': lambda: homework.deliver_message(
+            bot, '1', 'text'
+        ),
+        'decode_response': lambda: decode_response(transport.response),
+        'request_statuses': lambda: homework.request_homework_statuses(
+            {}, 0, transport=transport
+        ),
+        'request_changed': lambda: homework.request_homework_statuses(
+            {}, 0, transport=transport,
+            validator=ResponseValidator(enabled=True)
+        ),
+        'request_unchanged': lambda: homework.request_homework_statuses(
+            {}, 0, transport=transport, validator=unchanged
+        ),
+    }
+    return {
+        name: timeit.timeit(case, number=number) / number * 10 ** 6
+        for name, case in cases.items()
+    }
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--subscriptions')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--change-every', type=int, default=2)
+    parser.add_argument('--json', help='файл для сохранения результатов')
+    parser.add_argument('--workload', help='файл сценария нагрузки')
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload) if args.workload else None
+    sizes = args.subscriptions or (
+        str(workload.get('students', 1)) if workload else '1,100,10000'
+    )
+
+    results = {'pipeline': [], 'micro_us': run_micro()}
+    for name, value in results['micro_us'].items():
+        print(f'{name:>20}: {value:8.2f} мкс')
+    for size in map(int, sizes.split(',')):
+        result = run_pipeline(size, args.rounds, args.change_every, workload)
+        results['pipeline'].append(result)
+        print(json.dumps(result, ensure_ascii=False))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Бенчмарк запуска воркера: стоимость импортов и время до первого опроса.
+
+Запуск из корня репозитория:
+    python -m bench.startup --modules homework,scheduler,supervisor
+
+Импорты замеряются через `python -X importtime` в отдельном процессе,
+время до первого опроса - от запуска интерпретатора до ответа заглушки
+API. Тяжёлые зависимости не должны загружаться при импорте модулей бота.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('requests', 'telebot', 'urllib3', 'http.server', 'dotenv')
+FIRST_POLL_TARGET_MS = float(os.getenv('FIRST_POLL_TARGET_MS', 500))
+
+
+def _run(args, python=sys.executable):
+    return subprocess.run(
+        [python, *args], cwd=ROOT, check=True, capture_output=True, text=True
+    )
+
+
+def parse_importtime(output):
+    """
+    Функция разбирает вывод `-X importtime`.
+    Возвращает словарь модуль -> накопленное время импорта в мс.
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        try:
+            modules[name.strip()] = int(cumulative) / 1000
+        except ValueError:
+            continue
+    return modules
+
+
+def import_profile(module, python=sys.executable):
+    """
+    Замеряет импорт `module` в чистом интерпретаторе.
+    Возвращает время импорта и загруженные им тяжёлые зависимости.
+    Модули, загруженные при старте интерпретатора, не учитываются.
+    """
+    baseline = parse_importtime(
+        _run(['-X', 'importtime', '-c', 'pass'], python).stderr
+    )
+    imported = parse_importtime(
+        _run(['-X', 'importtime', '-c', f'import {module}'], python).stderr
+    )
+    return {
+        'import_ms': imported[module],
+        'heavy_modules': [
+            name for name in HEAVY_MODULES
+            if name in imported and name not in baseline
+        ],
+    }
+
+
+def time_to_first_poll(endpoint, python=sys.executable):
+    """Возвращает мс от запуска процесса воркера до конца первого опроса."""
+    started = time.perf_counter()
+    _run(['-m', 'bench.startup', '--first-poll', endpoint], python)
+    return (time.perf_counter() - started) * 1000
+
+
+def first_poll(endpoint):
+    """Опрашивает API один раз, как это делает воркер после запуска."""
+    import homework
+    from scheduler import poll_subscription
+    from subscriptions import Subscription
+    from transport import HTTPTransport
+
+    class NullBot:
+        def send_message(self, chat_id=None, text=None):
+            """Ничего не отправляет."""
+
+    homework.ENDPOINT = endpoint
+    with HTTPTransport() as transport:
+        return poll_subscription(
+            NullBot(), Subscription('startup', '1', cursor=0), transport
+        )
+
+
+def run_startup(modules=('homework',), target_ms=FIRST_POLL_TARGET_MS):
+    """
+    Функция замеряет запуск воркера.
+    Возвращает словарь с результатами и признаком укладывания
+    времени до первого опроса в `target_ms`.
+    """
+    from bench.run import start_fake_servers
+
+    started = time.perf_counter()
+    _run(['-c', 'pass'])
+    interpreter_ms = (time.perf_counter() - started) * 1000
+    process, practicum_url, _ = start_fake_servers(change_every=2)
+    try:
+        first_poll_ms = time_to_first_poll(
+            f'{practicum_url}/api/user_api/homework_statuses/'
+        )
+    finally:
+        process.terminate()
+    return {
+        'interpreter_ms': interpreter_ms,
+        'imports': {module: import_profile(module) for module in modules},
+        'first_poll_ms': first_poll_ms,
+        'target_ms': target_ms,
+        'within_target': first_poll_ms <= target_ms,
+    }
+
+
+def main():
+    """Точка входа бенчмарка запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modules', default='homework,scheduler,supervisor')
+    parser.add_argument(
+        '--target-ms', type=float, default=FIRST_POLL_TARGET_MS
+    )
+    parser.add_argument('--first-poll', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_poll:
+        return 1 if first_poll(args.first_poll) is not None else 0
+    result = run_startup(args.modules.split(','), args.target_ms)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0 if result['within_target'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
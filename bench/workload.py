@@ -0,0 +1,298 @@
+"""
+Сценарии нагрузки для заглушки API Практикума.
+
+Сценарий описывается JSON-файлом:
+    {
+        "seed": 1,
+        "students": 1000,
+        "homeworks": 3,
+        "transition_rate": 0.2,
+        "approve_ratio": 0.6,
+        "latency": {"distribution": "lognormal", "median_ms": 40,
+                    "sigma": 0.6},
+        "faults": [{"after": 30, "until": 90,
+                    "rates": {"500": 0.3, "429": 0.1}}],
+        "retry_after": 2,
+        "replay": {"*": [{"status": 502, "raw": "Bad Gateway"}]}
+    }
+
+`students` - число подписок, которое создаёт бенчмарк; у каждого токена
+`homeworks` работ, и при каждом опросе статус непроверенной работы
+меняется с вероятностью `transition_rate`. Ответ, как и настоящий API,
+содержит работы, обновлённые не раньше `from_date`.
+
+`faults` - вероятности сбоев: коды 500/502/503, 429 с `Retry-After`,
+`malformed` (обрезанный JSON) и `missing_keys` (ответ без `homeworks`).
+Словарь действует всё время, список задаёт фазы по секундам от запуска.
+
+`replay` - записанные ответы, которые отдаются по порядку до
+синтетических: список для всех токенов или словарь токен -> список,
+где `*` - список по умолчанию. `replay_file` читает ответы из JSONL.
+Ответ: {"status", "headers", "body" | "raw", "delay_ms"}.
+"""
+import json
+import math
+import random
+import threading
+import time
+
+STATUS_CODE_FAULTS = ('429', '500', '502', '503')
+FORMAT_FAULTS = ('malformed', 'missing_keys')
+FAULTS = STATUS_CODE_FAULTS + FORMAT_FAULTS
+
+REVIEWING = 'reviewing'
+APPROVED = 'approved'
+REJECTED = 'rejected'
+
+
+def _positive(config, key, default):
+    value = float(config.get(key, default))
+    if value < 0:
+        raise ValueError(f'Параметр `{key}` не может быть отрицательным.')
+    return value
+
+
+def _probability(value, name):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(f'Вероятность `{name}` должна быть от 0 до 1.')
+    return value
+
+
+def make_latency(config=None):
+    """
+    Функция возвращает генератор задержки ответа в секундах.
+    Распределения: constant (`ms`), uniform (`min_ms`, `max_ms`),
+    exponential (`mean_ms`) и lognormal (`median_ms`, `sigma`).
+    """
+    config = config or {'distribution': 'constant', 'ms': 0}
+    distribution = config.get('distribution', 'constant')
+    if distribution == 'constant':
+        delay = _positive(config, 'ms', 0) / 1000
+        return lambda rng: delay
+    if distribution == 'uniform':
+        low = _positive(config, 'min_ms', 0) / 1000
+        high = _positive(config, 'max_ms', 0) / 1000
+        return lambda rng: rng.uniform(low, high)
+    if distribution == 'exponential':
+        mean = _positive(config, 'mean_ms', 0) / 1000
+        return lambda rng: rng.expovariate(1 / mean) if mean else 0
+    if distribution == 'lognormal':
+        mu = math.log(max(_positive(config, 'median_ms', 1), 1e-3) / 1000)
+        sigma = _positive(config, 'sigma', 0.5)
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f'Неизвестное распределение задержки: {distribution}')
+
+
+def parse_faults(config=None):
+    """
+    Функция приводит описание сбоев к списку фаз.
+    Фаза - (начало, конец или None, {вид сбоя: вероятность}).
+    """
+    if not config:
+        return []
+    if isinstance(config, dict):
+        config = [{'rates': config}]
+    phases = []
+    for phase in config:
+        rates = {}
+        for kind, rate in phase.get('rates', {}).items():
+            if kind not in FAULTS:
+                raise ValueError(f'Неизвестный вид сбоя: {kind}')
+            rates[kind] = _probability(rate, kind)
+        if sum(rates.values()) > 1:
+            raise ValueError('Сумма вероятностей сбоев больше 1.')
+        until = phase.get('until')
+        phases.append((
+            float(phase.get('after', 0)),
+            None if until is None else float(until),
+            rates,
+        ))
+    return phases
+
+
+def load_replay(config):
+    """
+    Функция возвращает записанные ответы сценария по токенам.
+    Ответы из `replay_file` (JSON-объект на строку) дополняют
+    список по умолчанию.
+    """
+    replay = config.get('replay') or {}
+    if isinstance(replay, list):
+        replay = {'*': replay}
+    replay = {token: list(entries) for token, entries in replay.items()}
+    path = config.get('replay_file')
+    if path:
+        with open(path, encoding='utf-8') as file:
+            replay.setdefault('*', []).extend(
+                json.loads(line) for line in file if line.strip()
+            )
+    return replay
+
+
+def load_workload(path):
+    """Функция читает сценарий нагрузки из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class _Homework:
+    __slots__ = ('id', 'name', 'status', 'updated_at')
+
+    def __init__(self, id, name, updated_at):
+        self.id = id
+        self.name = name
+        self.status = REVIEWING
+        self.updated_at = updated_at
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'homework_name': self.name,
+            'status': self.status,
+            'reviewer_comment': '',
+            'date_updated': time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.updated_at)
+            ),
+            'lesson_name': 'workload',
+        }
+
+
+class Workload:
+    """
+    Поведение заглушки API Практикума по сценарию нагрузки.
+    Метод `respond` отдаёт записанный ответ, если он есть, затем
+    с заданной вероятностью - сбой, иначе - синтетический ответ
+    по состоянию работ студента. Время изменения каждого статуса
+    сохраняется в `changed_at` для замера задержки доставки.
+    """
+
+    def __init__(self, config, clock=time.time):
+        self.students = int(config.get('students', 1))
+        self.homeworks = int(config.get('homeworks', 1))
+        self.transition_rate = _probability(
+            config.get('transition_rate', 0.5), 'transition_rate'
+        )
+        self.approve_ratio = _probability(
+            config.get('approve_ratio', 0.5), 'approve_ratio'
+        )
+        self.retry_after = config.get('retry_after', 1)
+        self.latency = make_latency(config.get('latency'))
+        self.faults = parse_faults(config.get('faults'))
+        self.replay = load_replay(config)
+        self.clock = clock
+        self.changed_at = {}
+        self.injected = dict.fromkeys(FAULTS, 0)
+        self._random = random.Random(config.get('seed'))
+        self._lock = threading.Lock()
+        self._students = {}
+        self._replayed = {}
+        self._started = time.monotonic()
+
+    def respond(self, token, from_date=0):
+        """
+        Возвращает ответ на опрос токена.
+        Ответ - (код, заголовки, тело в байтах, задержка в секундах).
+        """
+        with self._lock:
+            delay = self.latency(self._random)
+            entry = self._next_replay(token)
+            if entry is not None:
+                return replay_response(entry, delay)
+            fault = self._pick_fault()
+            if fault is not None:
+                self.injected[fault] += 1
+                return (*self._fault_response(fault), delay)
+            return 200, {}, self._synthesize(token, from_date), delay
+
+    def _next_replay(self, token):
+        entries = self.replay.get(token, self.replay.get('*'))
+        if not entries:
+            return None
+        position = self._replayed.get(token, 0)
+        if position >= len(entries):
+            return None
+        self._replayed[token] = position + 1
+        return entries[position]
+
+    def _pick_fault(self):
+        elapsed = time.monotonic() - self._started
+        roll = self._random.random()
+        for after, until, rates in self.faults:
+            if elapsed < after or (until is not None and elapsed >= until):
+                continue
+            for kind, rate in rates.items():
+                if roll < rate:
+                    return kind
+                roll -= rate
+            return None
+        return None
+
+    def _fault_response(self, fault):
+        now = int(self.clock())
+        if fault == 'malformed':
+            body = json.dumps({'homeworks': [], 'current_date': now})
+            return 200, {}, body[:len(body) // 2].encode()
+        if fault == 'missing_keys':
+            return 200, {}, json.dumps({'current_date': now}).encode()
+        headers = {}
+        if fault == '429':
+            headers['Retry-After'] = str(self.retry_after)
+        body = json.dumps({'code': fault, 'message': 'Injected fault'})
+        return int(fault), headers, body.encode()
+
+    def _student(self, token, now):
+        student = self._students.get(token)
+        if student is None:
+            student = [
+                _Homework(
+                    len(self._students) * self.homeworks + index + 1,
+                    f'hw-{token}-{index}', now
+                )
+                for index in range(self.homeworks)
+            ]
+            self._students[token] = student
+            started = time.monotonic()
+            for homework in student:
+                self.changed_at[homework.name] = started
+        return student
+
+    def _advance(self, homework, now):
+        if homework.status == APPROVED:
+            return
+        if self._random.random() >= self.transition_rate:
+            return
+        if homework.status == REJECTED:
+            homework.status = REVIEWING
+        elif self._random.random() < self.approve_ratio:
+            homework.status = APPROVED
+        else:
+            homework.status = REJECTED
+        homework.updated_at = now
+        self.changed_at[homework.name] = time.monotonic()
+
+    def _synthesize(self, token, from_date):
+        now = int(self.clock())
+        student = self._student(token, now)
+        for homework in student:
+            self._advance(homework, now)
+        homeworks = sorted(
+            (homework for homework in student
+             if homework.updated_at >= from_date),
+            key=lambda homework: homework.updated_at, reverse=True,
+        )
+        return json.dumps({
+            'homeworks': [homework.as_dict() for homework in homeworks],
+            'current_date': now,
+        }).encode()
+
+
+def replay_response(entry, delay=0):
+    """Функция превращает записанный ответ в кортеж ответа заглушки."""
+    if 'raw' in entry:
+        body = entry['raw'].encode()
+    else:
+        body = json.dumps(entry.get('body', {}), ensure_ascii=False).encode()
+    if 'delay_ms' in entry:
+        delay = entry['delay_ms'] / 1000
+    return entry.get('status', 200), entry.get('headers', {}), body, delay
@@ -0,0 +1,142 @@
+import os
+import random
+import threading
+import time
+
+from exceptions import (
+    APIThrottledError,
+    RequestExceptionError,
+    ResponseStatusError,
+)
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 3))
+BREAKER_BASE_DELAY = float(os.getenv('BREAKER_BASE_DELAY', 30))
+BREAKER_MAX_DELAY = float(os.getenv('BREAKER_MAX_DELAY', 30 * 60))
+BREAKER_JITTER = float(os.getenv('BREAKER_JITTER', 0.2))
+BREAKER_RECOVERY_WINDOW = float(os.getenv('BREAKER_RECOVERY_WINDOW', 60))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_endpoint_failure(error):
+    """
+    Функция определяет, говорит ли ошибка о недоступности эндпоинта.
+    Ошибки конкретного токена (например, 401) автомат не размыкают.
+    """
+    if isinstance(error, (RequestExceptionError, APIThrottledError)):
+        return True
+    if isinstance(error, ResponseStatusError):
+        return (error.status_code or 0) >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель запросов к одному эндпоинту.
+    После `failure_threshold` сбоев подряд автомат размыкается
+    и не пропускает запросы, пока не истечёт пауза. Пауза растёт
+    экспоненциально с каждым повторным размыканием, а если API
+    передал `Retry-After`, используется она. По истечении паузы
+    пропускается один пробный запрос: успех замыкает автомат,
+    сбой снова размыкает его. Если за `base_delay` секунд результат
+    пробы не записан (например, опрашивать было некого), пропускается
+    новая проба. Накопившиеся за время сбоя опросы
+    распределяются по `recovery_window` секундам.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        base_delay=BREAKER_BASE_DELAY,
+        max_delay=BREAKER_MAX_DELAY,
+        jitter=BREAKER_JITTER,
+        recovery_window=BREAKER_RECOVERY_WINDOW,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_window = recovery_window
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state = CLOSED
+        self._failures = 0
+        self._openings = 0
+        self._opened_until = 0
+        self._lock = threading.Lock()
+
+    def allow(self, now=None):
+        """Проверяет, можно ли сейчас отправить запрос к эндпоинту."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if now < self._opened_until:
+                return False
+            self.state = HALF_OPEN
+            self._opened_until = now + self.base_delay
+            return True
+
+    def retry_in(self, now=None):
+        """Возвращает время в секундах до следующего разрешённого запроса."""
+        now = time.monotonic() if now is None else now
+        if self.state != OPEN:
+            return 0
+        return max(self._opened_until - now, 0)
+
+    def record_success(self):
+        """
+        Отмечает успешный запрос.
+        Возвращает True, если автомат был разомкнут и теперь замкнулся.
+        """
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self._failures = 0
+            self._openings = 0
+            return recovered
+
+    def record_failure(self, error, now=None):
+        """
+        Отмечает сбой запроса и при необходимости размыкает автомат.
+        Ошибки, не связанные с доступностью эндпоинта, означают,
+        что API ответил, и учитываются как успех.
+        """
+        if not is_endpoint_failure(error):
+            return self.record_success()
+        now = time.monotonic() if now is None else now
+        retry_after = getattr(error, 'retry_after', None)
+        with self._lock:
+            self._failures += 1
+            if (
+                self.state != CLOSED
+                or retry_after is not None
+                or self._failures >= self.failure_threshold
+            ):
+                self._open(now, retry_after)
+        return False
+
+    def record(self, error, now=None):
+        """
+        Отмечает результат запроса: `error` равен None при успехе.
+        Возвращает True, если автомат замкнулся после сбоя.
+        """
+        if error is None:
+            return self.record_success()
+        return self.record_failure(error, now)
+
+    def _open(self, now, retry_after):
+        """Размыкает автомат на время паузы."""
+        self._openings += 1
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+            delay *= 1 + random.uniform(0, self.jitter)
+        else:
+            delay = min(
+                self.base_delay * 2 ** min(self._openings - 1, 32),
+                self.max_delay
+            )
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.state = OPEN
+        self._failures = 0
+        self._opened_until = now + delay
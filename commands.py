@@ -0,0 +1,261 @@
+import logging
+import os
+import threading
+import time
+
+from breaker import CLOSED
+from exceptions import HomeworkNotFoundError
+from homework import (
+    RENDERER,
+    deliver_message,
+    find_changes,
+    get_next_timestamp,
+)
+from records import HomeworkStatus
+from response_cache import read_homework_statuses
+from subscriptions import save_subscriptions
+
+logger = logging.getLogger(__name__)
+
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '0') != '0'
+COMMANDS_POLL_TIMEOUT = int(os.getenv('COMMANDS_POLL_TIMEOUT', 30))
+COMMANDS_BATCH_SIZE = int(os.getenv('COMMANDS_BATCH_SIZE', 100))
+COMMANDS_RETRY_DELAY = float(os.getenv('COMMANDS_RETRY_DELAY', 5))
+
+STATUS_TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+
+def render_subscription_status(subscription, changes=(), cursor=None):
+    """
+    Функция описывает состояние подписки на её языке.
+    Известные статусы дополняются изменениями `changes` из свежего
+    ответа API, `cursor` - метка времени этого ответа. Работа
+    называется по имени из ответа, а если его нет - по ключу.
+    """
+    statuses = dict(subscription.statuses.items())
+    names = {}
+    for key, status, homework in changes:
+        statuses[key] = status
+        names[key] = homework.name
+    if cursor is None:
+        cursor = subscription.cursor
+    locale = subscription.locale
+    reviewing = sum(
+        HomeworkStatus.from_api(status) is HomeworkStatus.REVIEWING
+        for status in statuses.values()
+    )
+    checked_at = time.strftime(STATUS_TIME_FORMAT, time.localtime(cursor))
+    lines = [
+        RENDERER.render_reply('status_checked', checked_at, locale=locale),
+        RENDERER.render_reply(
+            'status_summary', len(statuses), reviewing, locale=locale
+        ),
+    ]
+    for key, status in statuses.items():
+        code = HomeworkStatus.from_api(status)
+        lines.append(RENDERER.render_reply(
+            'status_homework', names.get(key) or key,
+            RENDERER.verdict(code, locale) or status, locale=locale
+        ))
+    if subscription.last_error_message is not None:
+        lines.append(RENDERER.render_reply(
+            'status_error', subscription.last_error_message, locale=locale
+        ))
+    return '\n'.join(lines)
+
+
+class CommandListener:
+    """
+    Приём команд бота через long polling `getUpdates`.
+    Обновления забираются пачками до `limit` штук, а смещение
+    `offset` подтверждает обработанные, так что каждая команда
+    выполняется один раз. Подписки меняются через `scheduler`
+    без перезапуска, реестр сохраняется в `subscriptions_file`.
+    `/status` отвечает по состоянию подписок в памяти и лишь
+    дополняет его ответом API из кеша планировщика, пока автомат
+    планировщика замкнут: при сбоях API запросы пользователей
+    к нему не идут.
+    """
+
+    def __init__(
+        self, bot, scheduler, outbox=None, subscriptions_file=None,
+        timeout=COMMANDS_POLL_TIMEOUT, limit=COMMANDS_BATCH_SIZE
+    ):
+        self.bot = bot
+        self.scheduler = scheduler
+        self.outbox = outbox or bot
+        self.subscriptions_file = (
+            subscriptions_file or os.getenv('SUBSCRIPTIONS_FILE')
+        )
+        self.timeout = timeout
+        self.limit = limit
+        self.offset = None
+        self._handlers = {
+            '/start': self._help,
+            '/help': self._help,
+            '/subscribe': self._subscribe,
+            '/unsubscribe': self._unsubscribe,
+            '/status': self._status,
+        }
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """Забирает и обрабатывает одну пачку обновлений."""
+        updates = self.bot.get_updates(
+            offset=self.offset,
+            limit=self.limit,
+            timeout=self.timeout,
+            allowed_updates=['message'],
+            long_polling_timeout=self.timeout,
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is not None:
+                self.handle(message.chat.id, message.text)
+        return len(updates)
+
+    def handle(self, chat_id, text):
+        """Выполняет команду из сообщения и отвечает в чат."""
+        if not text or not text.startswith('/'):
+            return None
+        chat_id = str(chat_id)
+        command, _, argument = text.strip().partition(' ')
+        command = command.split('@', 1)[0].lower()
+        handler = self._handlers.get(command, self._help)
+        reply = handler(chat_id, argument.strip())
+        deliver_message(self.outbox, chat_id, reply)
+        return reply
+
+    def _reply(self, name, subscriptions=()):
+        """Отрисовывает ответ на языке подписок чата."""
+        locale = next(
+            (
+                subscription.locale for subscription in subscriptions
+                if subscription.locale is not None
+            ),
+            None
+        )
+        return RENDERER.render_reply(name, locale=locale)
+
+    def _help(self, chat_id, argument):
+        return self._reply(
+            'help', self.scheduler.registry.for_chat(chat_id)
+        )
+
+    def _subscribe(self, chat_id, token):
+        subscriptions = self.scheduler.registry.for_chat(chat_id)
+        if not token:
+            return self._reply('subscribe_usage', subscriptions)
+        if not self.subscriptions_file:
+            return self._reply('commands_disabled', subscriptions)
+        subscription = self.scheduler.subscribe(token, chat_id)
+        logger.info(
+            'Подписка %s оформлена в чате %s.', subscription.id, chat_id
+        )
+        saved = self._save()
+        return self._reply(
+            'subscribed' if saved else 'not_saved',
+            self.scheduler.registry.for_chat(chat_id)
+        )
+
+    def _unsubscribe(self, chat_id, argument):
+        subscriptions = self.scheduler.registry.for_chat(chat_id)
+        if not subscriptions:
+            return self._reply('not_subscribed')
+        if not self.subscriptions_file:
+            return self._reply('commands_disabled', subscriptions)
+        for subscription in subscriptions:
+            self.scheduler.unsubscribe(subscription.token)
+            logger.info(
+                'Подписка %s отменена в чате %s.', subscription.id, chat_id
+            )
+        saved = self._save()
+        return self._reply(
+            'unsubscribed' if saved else 'not_saved', subscriptions
+        )
+
+    def _status(self, chat_id, argument):
+        subscriptions = self.scheduler.registry.for_chat(chat_id)
+        if not subscriptions:
+            return self._reply('not_subscribed')
+        return '\n\n'.join(
+            render_subscription_status(
+                subscription, *self._fetch(subscription)
+            )
+            for subscription in subscriptions
+        )
+
+    def _fetch(self, subscription):
+        """
+        Читает ответ API через кеш и находит в нём изменения.
+        Возвращает (изменения, метка времени ответа); без кеша,
+        при разомкнутом автомате или при сбое - данные в памяти
+        без изменений. Состояние автомата только читается, чтобы
+        не занять пробный запрос планировщика.
+        """
+        if (
+            self.scheduler.cache is None
+            or self.scheduler.breaker.state != CLOSED
+        ):
+            return (), None
+        try:
+            response = read_homework_statuses(
+                subscription, self.scheduler.transport,
+                cache=self.scheduler.cache
+            )
+            cursor = get_next_timestamp(response, subscription.cursor)
+            changes = find_changes(subscription.statuses, response)
+            return changes, cursor
+        except HomeworkNotFoundError:
+            return (), cursor
+        except Exception as error:
+            logger.warning(
+                'Не удалось обновить статусы подписки %s: %s',
+                subscription.id, error
+            )
+            return (), None
+
+    def _save(self):
+        """
+        Сохраняет реестр, чтобы подписки пережили перезапуск.
+        Возвращает False, если сохранить реестр не удалось.
+        """
+        try:
+            save_subscriptions(
+                self.scheduler.registry, self.subscriptions_file
+            )
+        except OSError as error:
+            logger.error('Не удалось сохранить подписки: %s', error)
+            return False
+        return True
+
+    def run(self):
+        """Цикл потока приёма команд."""
+        while not self._stopping.is_set():
+            try:
+                self.poll_once()
+            except Exception as error:
+                logger.error('Не удалось получить команды бота: %s', error)
+                self._stopping.wait(COMMANDS_RETRY_DELAY)
+
+    def start(self):
+        """Запускает поток приёма команд."""
+        self._thread = threading.Thread(
+            target=self.run, name='telegram-commands', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Останавливает поток после текущего запроса обновлений."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop(0)
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import re
+
+from json_codec import BYTES_TYPES
+from metrics import SKIPPED_RESPONSES
+
+CONDITIONAL_REQUESTS = os.getenv('CONDITIONAL_REQUESTS', '1') != '0'
+CONDITIONAL_MIN_BYTES = int(os.getenv('CONDITIONAL_MIN_BYTES', 1024))
+
+NOT_MODIFIED_STATUS = 304
+
+CURRENT_DATE_KEY = b'"current_date"'
+_CURRENT_DATE_VALUE = re.compile(rb'[ \t\n\r]*:[ \t\n\r]*(\d+)')
+
+
+def conditional_headers(headers, validator=None):
+    """Функция добавляет к заголовкам запроса условные заголовки."""
+    if validator is None:
+        return headers
+    return validator.headers(headers)
+
+
+class NotModified:
+    """
+    Ответ API, список работ в котором не изменился с прошлого опроса.
+    `current_date` - метка времени из ответа или None для кода 304.
+    """
+
+    __slots__ = ('current_date',)
+
+    def __init__(self, current_date=None):
+        self.current_date = current_date
+
+
+def body_digest(content):
+    """
+    Функция хеширует сырое тело ответа без значения `current_date`.
+    Метка времени меняется в каждом ответе, поэтому её цифры
+    в хеш не попадают. Возвращает пару (`current_date`, хеш) или None,
+    если ключ `current_date` с целым значением встречается в теле
+    не ровно один раз.
+    """
+    content = bytes(content)
+    at = content.find(CURRENT_DATE_KEY)
+    if at < 0 or content.find(CURRENT_DATE_KEY, at + 1) >= 0:
+        return None
+    match = _CURRENT_DATE_VALUE.match(content, at + len(CURRENT_DATE_KEY))
+    if match is None:
+        return None
+    body = memoryview(content)
+    digest = hashlib.blake2b(body[:match.start(1)], digest_size=16)
+    digest.update(body[match.end(1):])
+    return int(match.group(1)), digest.digest()
+
+
+class ResponseValidator:
+    """
+    Признаки последнего обработанного ответа API для подписки.
+    Хранит ETag для заголовка `If-None-Match` и хеш сырого тела ответа
+    без `current_date`: если API не поддерживает ETag, ответ с тем же
+    списком работ распознаётся без разбора JSON. Тела короче `min_size`
+    не хешируются: их разбор дешевле хеширования. Признаки нового ответа
+    запоминаются вызовом `commit` только после его обработки,
+    так что ответ, обработка которого сорвалась, не будет пропущен.
+    С `enabled=False` запросы и ответы проходят без изменений.
+    """
+
+    __slots__ = ('enabled', 'min_size', 'etag', 'digest', '_pending')
+
+    def __init__(
+        self, enabled=CONDITIONAL_REQUESTS, min_size=CONDITIONAL_MIN_BYTES
+    ):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.etag = None
+        self.digest = None
+        self._pending = None
+
+    def headers(self, headers):
+        """Возвращает заголовки запроса с `If-None-Match`, если есть ETag."""
+        if not self.enabled or self.etag is None:
+            return headers
+        return dict(headers, **{'If-None-Match': self.etag})
+
+    def check(self, status_code, headers, content):
+        """
+        Проверяет, изменился ли ответ с прошлой обработки.
+        Возвращает `NotModified` или None, если ответ нужно разобрать.
+        Тело, в котором не нашлось `current_date`, тоже отдаётся
+        на разбор: ошибку формата сообщит обычный декодер.
+        Тело не сканируется как JSON: хешируются его сырые байты.
+        """
+        self._pending = None
+        if not self.enabled:
+            return None
+        if status_code == NOT_MODIFIED_STATUS:
+            SKIPPED_RESPONSES.labels('not_modified').inc()
+            return NotModified()
+        etag = (headers or {}).get('ETag')
+        hashed = None
+        if isinstance(content, BYTES_TYPES) and len(content) >= self.min_size:
+            hashed = body_digest(content)
+        if hashed is None:
+            self._pending = (etag, None)
+            return None
+        current_date, digest = hashed
+        if digest == self.digest:
+            SKIPPED_RESPONSES.labels('same_homeworks').inc()
+            return NotModified(current_date)
+        self._pending = (etag, digest)
+        return None
+
+    def commit(self):
+        """Запоминает признаки обработанного ответа."""
+        if self._pending is not None:
+            self.etag, self.digest = self._pending
+            self._pending = None
+
+    def reset(self):
+        """Забывает признаки, чтобы следующий ответ был разобран целиком."""
+        self.etag = self.digest = self._pending = None
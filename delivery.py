@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from metrics import TELEGRAM_FAILURES, TELEGRAM_SEND_SECONDS, TELEGRAM_SENT
+from tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', 5))
+TELEGRAM_RETRY_DELAY = float(os.getenv('TELEGRAM_RETRY_DELAY', 1))
+TELEGRAM_SEND_WORKERS = int(os.getenv('TELEGRAM_SEND_WORKERS', 4))
+TELEGRAM_STOP_TIMEOUT = float(os.getenv('TELEGRAM_STOP_TIMEOUT', 10))
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+MESSAGE_SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Ограничитель частоты: `rate` токенов в секунду, не больше `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = None
+        self._blocked_until = 0
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def delay(self, now):
+        """Возвращает время в секундах до появления свободного токена."""
+        self._refill(now)
+        wait = 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+        return max(wait, self._blocked_until - now)
+
+    def consume(self, now):
+        """Забирает токен."""
+        self._refill(now)
+        self._tokens -= 1
+
+    def block(self, until):
+        """Запрещает выдачу токенов до момента `until`."""
+        self._blocked_until = max(self._blocked_until, until)
+
+
+def coalesce(messages, limit=TELEGRAM_MESSAGE_LIMIT):
+    """
+    Функция склеивает сообщения одного чата в один текст.
+    Возвращает текст и число вошедших в него сообщений: склейка
+    останавливается, чтобы не превысить лимит длины сообщения Telegram.
+    """
+    text = messages[0]
+    count = 1
+    for message in messages[1:]:
+        if len(text) + len(MESSAGE_SEPARATOR) + len(message) > limit:
+            break
+        text = f'{text}{MESSAGE_SEPARATOR}{message}'
+        count += 1
+    return text, count
+
+
+def send_telegram_message(bot, chat_id, text):
+    """
+    Функция отправляет сообщение и учитывает его в метриках.
+    Очередь `DeliveryQueue` только принимает сообщение: метрики
+    отправки соберёт её поток, когда сообщение уйдёт в Telegram.
+    """
+    if isinstance(bot, DeliveryQueue):
+        bot.put(chat_id, text)
+        return
+    try:
+        with TELEGRAM_SEND_SECONDS.time(), TRACER.span('send'):
+            bot.send_message(chat_id=chat_id, text=text)
+    except Exception:
+        TELEGRAM_FAILURES.inc()
+        raise
+    TELEGRAM_SENT.inc()
+
+
+def get_retry_after(error):
+    """Функция извлекает `retry_after` из ответа Telegram с кодом 429."""
+    if getattr(error, 'error_code', None) != 429:
+        return None
+    result_json = getattr(error, 'result_json', None) or {}
+    return (result_json.get('parameters') or {}).get('retry_after')
+
+
+class DeliveryQueue:
+    """
+    Очередь исходящих сообщений Telegram с потоками отправки.
+    Поддерживает интерфейс `send_message` бота, поэтому может заменить
+    его в цикле опроса: опрос только ставит сообщение в очередь.
+    Сообщения одного чата, накопившиеся к моменту отправки, склеиваются
+    в одно. Частота отправки ограничена общим и поштучным для каждого
+    чата лимитом; при ответе 429 отправка в чат откладывается на
+    `retry_after`, при прочих ошибках повторяется с нарастающей паузой.
+    Из `workers` потоков отправки чат в каждый момент занимает
+    не больше одного, поэтому сообщения чата уходят по порядку.
+    """
+
+    def __init__(
+        self, bot,
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        chat_rate=TELEGRAM_CHAT_RATE,
+        max_retries=TELEGRAM_MAX_RETRIES,
+        retry_delay=TELEGRAM_RETRY_DELAY,
+        workers=1,
+    ):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.workers = workers
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets = {}
+        self._pending = {}
+        self._attempts = {}
+        self._ready = []
+        self._scheduled = set()
+        self._sending = set()
+        self._size = 0
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+    def __len__(self):
+        return self._size
+
+    def set_global_rate(self, rate):
+        """Меняет общий лимит частоты отправки."""
+        with self._condition:
+            self._global_bucket.rate = self._global_bucket.capacity = rate
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Ставит сообщение в очередь на отправку."""
+        self.put(chat_id, text)
+
+    def put(self, chat_id, text, front=False):
+        """Ставит сообщение в очередь чата."""
+        with self._condition:
+            messages = self._pending.setdefault(chat_id, [])
+            if front:
+                messages.insert(0, text)
+            else:
+                messages.append(text)
+            self._size += 1
+            if chat_id not in self._scheduled and chat_id not in self._sending:
+                self._schedule(chat_id, time.monotonic())
+            self._condition.notify()
+
+    def _schedule(self, chat_id, ready_at):
+        self._scheduled.add(chat_id)
+        heapq.heappush(self._ready, (ready_at, next(self._counter), chat_id))
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _next_batch(self):
+        """
+        Ждёт, пока лимиты позволят отправку, и забирает сообщения чата.
+        Возвращает (chat_id, текст, число сообщений) или None при остановке.
+        """
+        with self._condition:
+            while True:
+                if not self._ready:
+                    if self._stopping and not self._sending:
+                        return None
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                ready_at, _, chat_id = self._ready[0]
+                wait = max(ready_at - now, self._global_bucket.delay(now))
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._ready)
+                chat_bucket = self._chat_bucket(chat_id)
+                chat_wait = chat_bucket.delay(now)
+                if chat_wait > 0:
+                    self._schedule(chat_id, now + chat_wait)
+                    continue
+                self._scheduled.discard(chat_id)
+                self._sending.add(chat_id)
+                self._global_bucket.consume(now)
+                chat_bucket.consume(now)
+                messages = self._pending.pop(chat_id)
+                text, count = coalesce(messages)
+                if count < len(messages):
+                    self._pending[chat_id] = messages[count:]
+                self._size -= count
+                return chat_id, text, count
+
+    def _release(self, chat_id):
+        """Освобождает чат после отправки и планирует его остаток."""
+        with self._condition:
+            self._sending.discard(chat_id)
+            if self._pending.get(chat_id) and chat_id not in self._scheduled:
+                self._schedule(chat_id, time.monotonic())
+            self._condition.notify_all()
+
+    def _deliver(self, chat_id, text, count):
+        """Отправляет склеенное сообщение и планирует повтор при ошибке."""
+        try:
+            send_telegram_message(self.bot, chat_id, text)
+        except Exception as error:
+            retry_after = get_retry_after(error)
+            attempts = self._attempts.get(chat_id, 0) + 1
+            if retry_after is None and attempts > self.max_retries:
+                self._attempts.pop(chat_id, None)
+                logger.error(
+                    'Сообщение отправить не удалось, попыток: %d. %s',
+                    attempts, error
+                )
+                return
+            self._attempts[chat_id] = attempts
+            if retry_after is None:
+                retry_after = self.retry_delay * 2 ** (attempts - 1)
+            logger.warning(
+                'Отправка в Telegram отложена на %s с. %s', retry_after, error
+            )
+            with self._condition:
+                self._chat_bucket(chat_id).block(
+                    time.monotonic() + retry_after
+                )
+            self.put(chat_id, text, front=True)
+        else:
+            self._attempts.pop(chat_id, None)
+            logger.debug(
+                'Сообщение в Telegram успешно отправлено, '
+                'объединено сообщений: %d.', count
+            )
+
+    def run(self):
+        """Цикл потока отправки."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._deliver(*batch)
+            finally:
+                self._release(batch[0])
+
+    def start(self):
+        """Запускает потоки отправки."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self.run, name=f'telegram-delivery-{number}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Дожидается отправки очереди и останавливает потоки.
+        Сообщения, не отправленные за `timeout` секунд, теряются:
+        потоки отправки не мешают процессу завершиться.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None
+                else max(deadline - time.monotonic(), 0)
+            )
+        if self._size:
+            logger.warning(
+                'Очередь остановлена, не отправлено сообщений: %d.',
+                self._size
+            )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop(TELEGRAM_STOP_TIMEOUT)
+
+
+class SendPool(DeliveryQueue):
+    """
+    Очередь отправки с несколькими потоками для многопоточного опроса.
+    Разные чаты отправляются параллельно, а лимиты, склейка и повторы
+    при ошибках те же, что у `DeliveryQueue`.
+    """
+
+    def __init__(self, bot, workers=TELEGRAM_SEND_WORKERS, **kwargs):
+        super().__init__(bot, workers=workers, **kwargs)
@@ -0,0 +1,113 @@
+import os
+import re
+import time
+
+ERROR_DEDUP_WINDOW = float(os.getenv('ERROR_DEDUP_WINDOW', 3600))
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 3600))
+
+_VARIABLE_PARTS = re.compile(
+    r'0x[0-9a-fA-F]+|[0-9a-fA-F]{8,}|\d+(?:\.\d+)?'
+)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(message):
+    """
+    Функция приводит текст ошибки к виду, общему для её повторов.
+    Числа, адреса и шестнадцатеричные идентификаторы заменяются
+    на `#`, пробелы схлопываются.
+    """
+    message = _VARIABLE_PARTS.sub('#', message)
+    return _WHITESPACE.sub(' ', message).strip()
+
+
+def error_fingerprint(error):
+    """Функция возвращает отпечаток ошибки: класс и нормализованный текст."""
+    return f'{type(error).__name__}: {normalize_message(str(error))}'
+
+
+class _Seen:
+    """Учёт одного вида ошибки: время отправки и подавленные повторы."""
+
+    __slots__ = ('sent_at', 'suppressed', 'sample')
+
+    def __init__(self, sent_at, sample):
+        self.sent_at = sent_at
+        self.suppressed = 0
+        self.sample = sample
+
+
+class ErrorDeduplicator:
+    """
+    Подавление повторных уведомлений об ошибках.
+    Ошибки сравниваются по отпечатку `error_fingerprint`, так что
+    сбои, отличающиеся лишь кодом ответа или числом в тексте, считаются
+    одним видом. О виде ошибки сообщается не чаще раза в `window`
+    секунд, а подавленные повторы раз в `digest_interval` секунд
+    собираются в сводку. Отпечаток нужен лишь для сравнения, поэтому
+    пользователю показывается текст последней ошибки `last_message`.
+    """
+
+    __slots__ = ('window', 'digest_interval', 'last_fingerprint',
+                 'last_message', '_seen', '_digest_at')
+
+    def __init__(
+        self, window=ERROR_DEDUP_WINDOW,
+        digest_interval=ERROR_DIGEST_INTERVAL, now=None
+    ):
+        self.window = window
+        self.digest_interval = digest_interval
+        self.last_fingerprint = None
+        self.last_message = None
+        self._seen = {}
+        self._digest_at = time.monotonic() if now is None else now
+
+    def restore(self, fingerprint, now=None):
+        """
+        Восстанавливает последнюю отправленную ошибку после перезапуска.
+        Её повтор не отправляется, пока не истечёт окно.
+        """
+        if fingerprint is None:
+            return
+        now = time.monotonic() if now is None else now
+        self.last_fingerprint = fingerprint
+        self._seen[fingerprint] = _Seen(now, fingerprint)
+
+    def should_send(self, error, now=None):
+        """
+        Учитывает ошибку и решает, сообщать ли о ней.
+        Возвращает True для нового вида ошибки или по истечении окна.
+        """
+        now = time.monotonic() if now is None else now
+        fingerprint = error_fingerprint(error)
+        self.last_message = str(error)
+        seen = self._seen.get(fingerprint)
+        if seen is not None and now - seen.sent_at < self.window:
+            seen.suppressed += 1
+            seen.sample = str(error)
+            return False
+        if seen is None:
+            self._seen[fingerprint] = _Seen(now, str(error))
+        else:
+            seen.sent_at = now
+        self.last_fingerprint = fingerprint
+        return True
+
+    def digest(self, now=None):
+        """
+        Возвращает сводку подавленных повторов, если пора её отправить.
+        Сводка - список пар (текст ошибки, число повторов) или пустой
+        список. Давно не повторявшиеся ошибки забываются.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._digest_at < self.digest_interval:
+            return []
+        self._digest_at = now
+        entries = []
+        for fingerprint, seen in list(self._seen.items()):
+            if seen.suppressed:
+                entries.append((seen.sample, seen.suppressed))
+                seen.suppressed = 0
+            elif now - seen.sent_at >= self.window:
+                del self._seen[fingerprint]
+        return entries
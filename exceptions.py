@@ -25,6 +25,22 @@ class HomeworkResponseError(TypeError):
 class ResponseStatusError(Exception):
     """Исключение выбрасывается, если API возвращает код, отличный от 200."""
 
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class APIThrottledError(ResponseStatusError):
+    """
+    Исключение выбрасывается, если API просит повторить запрос позже.
+    API вернул код 429 или 503, в `retry_after` - пауза из заголовка
+    `Retry-After` в секундах, если он был передан.
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
 
 class APIResponseKeyError(TypeError):
     """
@@ -39,3 +55,15 @@ class RequestExceptionError(Exception):
 
 class ResponseFormatError(ValueError):
     """Исключение выбрасывается, если не удалось обработать ответ."""
+
+
+class SubscriptionConfigError(ValueError):
+    """Исключение выбрасывается при некорректном описании подписок."""
+
+
+class CircuitOpenError(Exception):
+    """Исключение выбрасывается, когда запросы к API приостановлены."""
+
+
+class MessageTemplateError(ValueError):
+    """Исключение выбрасывается при некорректных шаблонах сообщений."""
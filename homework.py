@@ -1,16 +1,18 @@
-import json
 import logging
 import logging.handlers
 import os
-import sys
 import time
 
-import requests
-from dotenv import load_dotenv
-from telebot import TeleBot
-
+from breaker import CircuitBreaker
+from conditional import (
+    NOT_MODIFIED_STATUS,
+    NotModified,
+    conditional_headers,
+)
+from delivery import send_telegram_message
 from exceptions import (
     APIResponseKeyError,
+    APIThrottledError,
     HomeworkNotFoundError,
     HomeworkResponseError,
     HomeworkStatusError,
@@ -20,9 +22,24 @@ from exceptions import (
     TimestampError,
     TokenNotFoundError,
 )
+from json_codec import decode_response
+from log_config import setup_logging
+from messages import load_renderer
+from metrics import (
+    API_ERRORS,
+    API_REQUEST_SECONDS,
+    JSON_DECODE_SECONDS,
+    POLLS,
+    start_metrics_server,
+)
+from polling_policy import PollingPolicy, has_reviewing
+from records import Homework, HomeworkStatus
+from state import open_state_store
+from subscriptions import Subscription
+from tracing import TRACER
+from transport import THROTTLE_STATUS_CODES, TIMEOUT, parse_retry_after
 
-load_dotenv()
-
+logger = logging.getLogger(__name__)
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
@@ -39,6 +56,24 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.',
 }
+RENDERER = load_renderer(HOMEWORK_VERDICTS)
+
+
+def load_environment():
+    """
+    Функция загружает переменные окружения из файла `.env`.
+    Её вызывают точки входа, а не импорт модуля, так что `python-dotenv`
+    загружается только при запуске бота. Токены и заголовки модуля
+    перечитываются из окружения, уже заданные переменные не меняются.
+    """
+    from dotenv import load_dotenv
+
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, HEADERS
+    load_dotenv()
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    HEADERS = make_headers(PRACTICUM_TOKEN)
 
 
 def check_tokens():
@@ -56,48 +91,151 @@ def check_tokens():
             )
 
 
-def send_message(bot, message):
-    """Функция отправляет сообщение в чат, определяемый TELEGRAM_CHAT_ID."""
-    try:
-        logging.debug('Подготовка к отправке сообщения в Telegram.')
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-        logging.debug('Сообщение в Telegram успешно отправлено.')
-    except Exception as error:
-        logging.error(f'Сообщение отправить не удалось. {error}')
+def make_headers(token):
+    """Функция формирует заголовки запроса для токена Практикума."""
+    return {'Authorization': f'OAuth {token}'}
 
 
-def get_api_answer(timestamp):
-    """Функция делает запрос к единственному эндпоинту API-сервиса."""
-    if not isinstance(timestamp, int) or timestamp < 0:
-        raise TimestampError('Введено некорректное значение метки времени.')
+def deliver_message(bot, chat_id, message):
+    """Функция отправляет сообщение в указанный чат Telegram."""
+    try:
+        logger.debug('Подготовка к отправке сообщения в Telegram.')
+        send_telegram_message(bot, chat_id, message)
+        logger.debug('Сообщение в Telegram успешно отправлено.')
+    except Exception as error:
+        logger.error('Сообщение отправить не удалось. %s', error)
 
-    payload = {'from_date': timestamp}
 
+def send_message(bot, message):
+    """Функция отправляет сообщение в чат, определяемый TELEGRAM_CHAT_ID."""
+    deliver_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def report_error(bot, subscription, error):
+    """
+    Функция логирует сбой и сообщает о нём в чат подписки.
+    Повторы того же вида ошибки в пределах окна не отправляются,
+    а попадают в периодическую сводку.
+    """
+    API_ERRORS.labels(type(error).__name__).inc()
+    message = RENDERER.render_error(str(error), subscription.locale)
+    logger.error(message)
+    if subscription.errors.should_send(error):
+        deliver_message(bot, subscription.chat_id, message)
+
+
+def send_error_digest(bot, subscription):
+    """Функция отправляет сводку подавленных повторов сбоев, если пора."""
+    entries = subscription.errors.digest()
+    if entries:
+        deliver_message(bot, subscription.chat_id, RENDERER.render_digest(
+            entries, subscription.errors.digest_interval, subscription.locale
+        ))
+
+
+def send_api_request(headers, payload, transport=None):
+    """
+    Функция выполняет HTTP-запрос к эндпоинту API-сервиса.
+    `requests` импортируется при первом запросе, а не при загрузке модуля.
+    """
+    import requests
+
+    POLLS.inc()
     try:
-        homework_statuses = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=payload
-        )
+        with API_REQUEST_SECONDS.time(), TRACER.span('http'):
+            if transport is None:
+                return requests.get(
+                    ENDPOINT,
+                    headers=headers,
+                    params=payload,
+                    timeout=TIMEOUT
+                )
+            return transport.get(
+                ENDPOINT,
+                headers=headers,
+                params=payload
+            )
     except requests.RequestException as error:
         raise RequestExceptionError(
             f'Ошибка при запросе к основному API: {error}'
         ) from error
 
-    if homework_statuses.status_code != 200:
+
+def validate_response(validator, status_code, headers, content):
+    """
+    Функция сверяет ответ API с последним обработанным ответом.
+    Возвращает `NotModified`, если список работ не изменился,
+    иначе None.
+    """
+    if validator is None or status_code not in (200, NOT_MODIFIED_STATUS):
+        return None
+    with TRACER.span('validate'):
+        return validator.check(status_code, headers, content)
+
+
+def request_homework_statuses(
+    headers, timestamp, transport=None, validator=None
+):
+    """
+    Функция запрашивает статусы работ с заданными заголовками.
+    Если передан `transport`, запрос выполняется через его пул
+    соединений, иначе - отдельным вызовом `requests.get`.
+    С `validator` запрос становится условным, а ответ с прежним
+    списком работ возвращается как `NotModified` без разбора.
+    """
+    if not isinstance(timestamp, int) or timestamp < 0:
+        raise TimestampError('Введено некорректное значение метки времени.')
+
+    payload = {'from_date': timestamp}
+    headers = conditional_headers(headers, validator)
+
+    homework_statuses = send_api_request(headers, payload, transport)
+    status_code = homework_statuses.status_code
+    if status_code in THROTTLE_STATUS_CODES:
+        raise APIThrottledError(
+            f'API просит повторить запрос позже. Код ответа API: '
+            f'{status_code}',
+            status_code,
+            parse_retry_after(homework_statuses.headers.get('Retry-After'))
+        )
+    unchanged = validate_response(
+        validator, status_code,
+        getattr(homework_statuses, 'headers', None),
+        getattr(homework_statuses, 'content', None)
+    )
+    if unchanged is not None:
+        return unchanged
+    if status_code != 200:
         raise ResponseStatusError(
             f'API возвращает код, отличный от 200.'
-            f'Код ответа API: {homework_statuses.status_code}'
+            f'Код ответа API: {status_code}',
+            status_code
         )
 
+    return decode_api_response(decode_response, homework_statuses)
+
+
+def decode_api_response(decode, response):
+    """
+    Функция разбирает ответ API функцией `decode`.
+    Ошибки разбора сообщаются как `ResponseFormatError`.
+    """
     try:
-        return homework_statuses.json()
-    except json.JSONDecodeError as error:
+        with JSON_DECODE_SECONDS.time(), TRACER.span('decode'):
+            return decode(response)
+    except ResponseFormatError:
+        raise
+    except ValueError as error:
         raise ResponseFormatError(
             f'Не удалось обработать ответ от сервера.{error}'
         ) from error
 
 
+def get_api_answer(timestamp):
+    """Функция делает запрос к единственному эндпоинту API-сервиса."""
+    return request_homework_statuses(HEADERS, timestamp)
+
+
 def check_response(response):
     """Функция проверяет ответ API на соответствие документации."""
     response_keys = ['homeworks', 'current_date']
@@ -119,8 +257,58 @@ def check_response(response):
         )
 
 
+def get_next_timestamp(response, timestamp):
+    """
+    Функция возвращает метку времени для следующего запроса.
+    Курсор сдвигается на `current_date` из ответа API, если он задан
+    корректно, иначе остаётся прежним.
+    """
+    if isinstance(response, NotModified):
+        current_date = response.current_date
+    elif isinstance(response, dict):
+        current_date = response.get('current_date')
+    else:
+        return timestamp
+    if isinstance(current_date, int) and current_date >= 0:
+        return current_date
+    return timestamp
+
+
+def find_changes(statuses, response):
+    """
+    Функция находит работы ответа с изменившимся статусом.
+    Возвращает тройки (ключ, код статуса, запись `Homework`).
+    `NotModified` не проверяется вовсе.
+    """
+    if isinstance(response, NotModified):
+        return []
+    with TRACER.span('check_response'):
+        check_response(response)
+    changes = statuses.changes(response['homeworks'])
+    records = []
+    for key, _, homework in changes:
+        record = Homework.from_dict(homework)
+        records.append((key, record.status, record))
+    return records
+
+
+def parse_record_status(homework, locale=None):
+    """Функция формирует сообщение о статусе по записи `Homework`."""
+    if homework.name is None:
+        raise APIResponseKeyError('Ответ API не содержит ключ `homework_name`')
+    if homework.status is None:
+        raise APIResponseKeyError('Ответ API не содержит ключ `status`')
+
+    if not RENDERER.knows(homework.status):
+        raise HomeworkStatusError('Неожиданный статус домашней работы.')
+    return RENDERER.render_status(homework.name, homework.status, locale)
+
+
 def parse_status(homework):
     """Функция извлекает статус конкретной домашней работы."""
+    if isinstance(homework, Homework):
+        return parse_record_status(homework)
+
     if 'homework_name' not in homework:
         raise APIResponseKeyError('Ответ API не содержит ключ `homework_name`')
     homework_name = homework['homework_name']
@@ -132,57 +320,97 @@ def parse_status(homework):
     if status not in HOMEWORK_VERDICTS:
         raise HomeworkStatusError('Неожиданный статус домашней работы.')
 
-    verdict = HOMEWORK_VERDICTS.get(status)
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return RENDERER.render_status(
+        homework_name, HomeworkStatus.from_api(status)
+    )
+
+
+def notify_new_statuses(bot, response, status_index, subscription=None):
+    """
+    Функция проверяет ответ API и сообщает о каждом изменении статуса.
+    Отправленные статусы фиксируются в `status_index`. Работа
+    с неизвестным статусом или без нужных ключей не прерывает обход:
+    о ней сообщается через `report_error` подписки `subscription`,
+    а без подписки сбой только логируется.
+    Возвращает число отправленных статусов.
+    """
+    try:
+        changes = find_changes(status_index, response)
+    except HomeworkNotFoundError:
+        logger.debug('Статус работы не изменился.')
+        return 0
+
+    if not changes:
+        logger.debug('Статус работы не изменился.')
+    sent = 0
+    for key, status, homework in changes:
+        try:
+            with TRACER.span('parse_status'):
+                message = parse_status(homework)
+        except (HomeworkStatusError, APIResponseKeyError) as error:
+            if subscription is None:
+                logger.error(error)
+            else:
+                report_error(bot, subscription, error)
+            continue
+        send_message(bot, message)
+        status_index.update(key, status)
+        sent += 1
+    return sent
 
 
 def main():
     """Основная логика работы бота."""
-    bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
+    from telebot import TeleBot
 
-    previous_status = None
-    current_error = None
-    previous_error = None
+    bot = TeleBot(token=TELEGRAM_TOKEN)
 
     try:
         check_tokens()
     except TokenNotFoundError as error:
-        logging.critical(error)
+        logger.critical(error)
         return
 
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            homework = response['homeworks'][0]
-            current_status = homework['status']
-            if current_status != previous_status:
-                message = parse_status(homework)
-                send_message(bot, message)
-                previous_status = current_status
-            else:
-                logging.debug('Статус работы не изменился.')
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logging.error(message)
-            current_error = str(error)
+    subscription = Subscription(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+    with open_state_store() as store, TRACER.subscription(subscription.id):
+        subscription.restore(store.load(subscription.id))
+        policy = PollingPolicy(RETRY_PERIOD, jitter=0)
+        breaker = CircuitBreaker()
 
-        if current_error != previous_error:
+        while True:
             try:
-                send_message(bot, message)
+                response = request_homework_statuses(
+                    HEADERS, subscription.cursor,
+                    validator=subscription.validator
+                )
+                if notify_new_statuses(
+                    bot, response, subscription.statuses, subscription
+                ):
+                    subscription.last_change_at = time.time()
+                subscription.cursor = get_next_timestamp(
+                    response, subscription.cursor
+                )
+                subscription.validator.commit()
             except Exception as error:
-                logging.error(error)
-
-            previous_error = current_error
-
-        time.sleep(RETRY_PERIOD)
+                breaker.record_failure(error)
+                report_error(bot, subscription, error)
+            else:
+                breaker.record_success()
+            send_error_digest(bot, subscription)
+
+            store.save(subscription.id, subscription.snapshot())
+            retry_period = max(
+                policy.next_interval(
+                    has_reviewing(subscription.statuses),
+                    time.time() - subscription.last_change_at
+                ),
+                breaker.retry_in()
+            )
+            time.sleep(retry_period)
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        format='%(levelname)s - %(asctime)s - %(message)s',
-        level=logging.DEBUG,
-        stream=sys.stdout
-    )
+    load_environment()
+    setup_logging()
+    start_metrics_server()
     main()
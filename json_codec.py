@@ -0,0 +1,41 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'orjson' if orjson else 'json')
+
+BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+def _stdlib_loads(data):
+    """Разбирает JSON стандартной библиотекой, считая байты UTF-8."""
+    if isinstance(data, BYTES_TYPES):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def get_loads(backend=JSON_BACKEND):
+    """Функция возвращает декодер JSON для выбранного бэкенда."""
+    if backend == 'orjson' and orjson is not None:
+        return orjson.loads
+    return _stdlib_loads
+
+
+loads = get_loads()
+
+
+def decode_response(response):
+    """
+    Функция разбирает JSON из сырых байтов ответа.
+    API отдаёт UTF-8, поэтому угадывание кодировки requests
+    пропускается. Объекты без байтового `content` разбираются
+    своим методом `json()`.
+    """
+    content = getattr(response, 'content', None)
+    if isinstance(content, BYTES_TYPES):
+        return loads(content)
+    return response.json()
@@ -0,0 +1,149 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+from tracing import current_stage, current_subscription
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DEBUG_SAMPLE = int(os.getenv('LOG_DEBUG_SAMPLE', 100))
+
+TEXT_FORMAT = '%(levelname)s - %(asctime)s - %(message)s'
+SAMPLER_MAX_KEYS = 1024
+
+
+def parse_levels(spec):
+    """
+    Функция разбирает уровни журнала модулей.
+    Строка имеет вид `scheduler=INFO,delivery=WARNING`.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level_name = item.partition('=')
+        level = logging.getLevelName(level_name.strip().upper())
+        if not name.strip() or not isinstance(level, int):
+            raise ValueError(f'Некорректный уровень журнала: {item}')
+        levels[name.strip()] = level
+    return levels
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет к записи подписку и этап конвейера опроса."""
+
+    def filter(self, record):
+        """Запоминает контекст потока, в котором создана запись."""
+        record.subscription = current_subscription()
+        record.stage = current_stage()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Выборка повторяющихся отладочных записей.
+    Из записей DEBUG с одинаковым шаблоном сообщения пропускаются
+    первая и затем каждая `every`-я, остальные отбрасываются до
+    форматирования. Записи уровнем выше проходят всегда.
+    """
+
+    def __init__(self, every=LOG_DEBUG_SAMPLE):
+        super().__init__()
+        self.every = every
+        self._counts = {}
+
+    def filter(self, record):
+        """Решает, попадёт ли запись в журнал."""
+        if record.levelno > logging.DEBUG or self.every <= 1:
+            return True
+        key = (record.name, record.msg)
+        if key not in self._counts and len(self._counts) >= SAMPLER_MAX_KEYS:
+            self._counts.clear()
+        # Гонка потоков здесь влияет лишь на точность выборки.
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Форматирует запись журнала как JSON-объект в одну строку."""
+
+    def format(self, record):
+        """Возвращает запись в виде JSON."""
+        entry = {
+            'time': time.strftime(
+                '%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)
+            ) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'message': record.getMessage(),
+            'subscription': getattr(record, 'subscription', None),
+            'stage': getattr(record, 'stage', None),
+        }
+        sample_rate = getattr(record, 'sample_rate', None)
+        if sample_rate is not None:
+            entry['sample_rate'] = sample_rate
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Обработчик, ставящий записи в очередь без форматирования.
+    Стандартный `QueueHandler.prepare` форматирует запись в потоке,
+    который её создал; здесь запись уходит в очередь как есть,
+    а шаблон с аргументами подставляет обработчик потока журнала.
+    """
+
+    def prepare(self, record):
+        """Возвращает запись без изменений."""
+        return record
+
+
+def setup_logging(
+    level=LOG_LEVEL, levels=LOG_LEVELS, log_format=LOG_FORMAT,
+    sample=LOG_DEBUG_SAMPLE, stream=None, text_format=TEXT_FORMAT
+):
+    """
+    Функция настраивает журнал бота.
+    Записи ставятся в очередь, а форматирует и пишет их в `stream`
+    отдельный поток `QueueListener`, так что цикл опроса не ждёт
+    ни форматирования, ни вывода. По умолчанию записи выводятся
+    текстом, JSON включается через `LOG_FORMAT=json`. Уровни модулей
+    задаются строкой `levels`, повторяющиеся отладочные записи
+    прореживаются до одной из `sample`.
+    Возвращает запущенный `QueueListener`.
+    """
+    module_levels = parse_levels(levels)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if log_format == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(text_format))
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(sample))
+    queue_handler.addFilter(ContextFilter())
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(stop_logging, listener)
+    return listener
+
+
+def stop_logging(listener):
+    """Дописывает записи из очереди и останавливает поток журнала."""
+    if getattr(listener, '_thread', None) is not None:
+        listener.stop()
@@ -0,0 +1,262 @@
+import json
+import os
+from functools import lru_cache
+from string import Formatter
+
+from exceptions import MessageTemplateError
+from records import HomeworkStatus
+
+MESSAGE_LOCALE = os.getenv('MESSAGE_LOCALE', 'ru')
+MESSAGE_TEMPLATES_FILE = os.getenv('MESSAGE_TEMPLATES_FILE')
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', 4096))
+
+DEFAULT_LOCALE = 'ru'
+STATUS_TEMPLATE = (
+    'Изменился статус проверки работы "{homework_name}". {verdict}'
+)
+ERROR_TEMPLATE = 'Сбой в работе программы: {error}'
+DIGEST_TEMPLATE = 'Повторов сбоя за {minutes} мин.: {count}. {error}'
+REPLY_TEMPLATES = {
+    'help': (
+        'Команды бота:\n'
+        '/subscribe <токен> - следить за работами по токену Практикума;\n'
+        '/unsubscribe - отменить подписки этого чата;\n'
+        '/status - последние известные статусы работ.'
+    ),
+    'subscribe_usage': 'Укажите токен Практикума: /subscribe <токен>.',
+    'subscribed': 'Подписка оформлена, изменения статусов придут в этот чат.',
+    'not_saved': (
+        'Сохранить подписки не удалось, изменение действует '
+        'до перезапуска бота.'
+    ),
+    'commands_disabled': (
+        'Управлять подписками через бота нельзя: бот не хранит '
+        'реестр подписок.'
+    ),
+    'unsubscribed': 'Подписка отменена.',
+    'not_subscribed': (
+        'В этом чате нет подписок. Оформите её командой /subscribe <токен>.'
+    ),
+    'status_checked': 'Данные на {checked_at}.',
+    'status_summary': (
+        'Работ отслеживается: {total}, на проверке: {reviewing}.'
+    ),
+    'status_homework': '{homework}: {verdict}',
+    'status_error': 'Последний сбой: {error}',
+}
+REPLY_FIELDS = {
+    'status_checked': ('checked_at',),
+    'status_summary': ('total', 'reviewing'),
+    'status_homework': ('homework', 'verdict'),
+    'status_error': ('error',),
+}
+
+
+class CompiledTemplate:
+    """
+    Шаблон сообщения, разобранный один раз при загрузке.
+    Постоянные поля подставляются при компиляции, так что
+    при отрисовке остаётся только склеить готовые части.
+    """
+
+    __slots__ = ('_parts',)
+
+    def __init__(self, template, fields, **constants):
+        parts = []
+        literal = ''
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as error:
+            raise MessageTemplateError(
+                f'Некорректный шаблон сообщения {template!r}: {error}'
+            ) from error
+        for text, field, spec, conversion in parsed:
+            literal += text
+            if field is None:
+                continue
+            if spec or conversion:
+                raise MessageTemplateError(
+                    f'Шаблон {template!r} не поддерживает форматирование '
+                    f'поля `{field}`.'
+                )
+            if field in constants:
+                literal += str(constants[field])
+            elif field in fields:
+                parts.append(literal)
+                parts.append(fields.index(field))
+                literal = ''
+            else:
+                raise MessageTemplateError(
+                    f'Шаблон {template!r} содержит неизвестное поле '
+                    f'`{field}`.'
+                )
+        parts.append(literal)
+        self._parts = tuple(parts)
+
+    def render(self, *values):
+        """Подставляет значения полей в порядке `fields`."""
+        values = [str(value) for value in values]
+        return ''.join(
+            values[part] if isinstance(part, int) else part
+            for part in self._parts
+        )
+
+
+def default_templates(verdicts):
+    """Функция возвращает встроенные шаблоны сообщений."""
+    return {
+        DEFAULT_LOCALE: {
+            'status': STATUS_TEMPLATE,
+            'error': ERROR_TEMPLATE,
+            'digest': DIGEST_TEMPLATE,
+            'verdicts': dict(verdicts),
+            'replies': dict(REPLY_TEMPLATES),
+        }
+    }
+
+
+def load_templates(path):
+    """
+    Функция читает шаблоны сообщений из JSON-файла.
+    Файл содержит объект `{locale: {"status": ..., "error": ...,
+    "digest": ..., "verdicts": {status: text}, "replies": {name: text}}}`,
+    любой ключ можно опустить. Имена ответов на команды бота -
+    ключи `REPLY_TEMPLATES`.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            templates = json.load(file)
+    except (OSError, ValueError) as error:
+        raise MessageTemplateError(
+            f'Не удалось загрузить шаблоны сообщений из {path}: {error}'
+        ) from error
+    if not isinstance(templates, dict):
+        raise MessageTemplateError(
+            f'Шаблоны сообщений в {path} должны быть JSON-объектом.'
+        )
+    return templates
+
+
+class MessageRenderer:
+    """
+    Отрисовка сообщений бота по скомпилированным шаблонам.
+    Шаблоны компилируются для каждой пары (язык, статус) при
+    создании, а готовые сообщения кешируются в LRU-кеше по ключу
+    (название работы, статус, язык). Недостающие в языке шаблоны
+    берутся из языка по умолчанию.
+    """
+
+    def __init__(
+        self, verdicts, templates=None, locale=MESSAGE_LOCALE,
+        cache_size=MESSAGE_CACHE_SIZE
+    ):
+        merged = default_templates(verdicts)
+        for name, overrides in (templates or {}).items():
+            if not isinstance(overrides, dict):
+                raise MessageTemplateError(
+                    f'Шаблоны языка {name!r} должны быть JSON-объектом.'
+                )
+            merged.setdefault(name, {}).update(overrides)
+        if locale not in merged:
+            raise MessageTemplateError(f'Нет шаблонов для языка {locale!r}.')
+        self.locale = locale
+        self._status = {}
+        self._error = {}
+        self._digest = {}
+        self._verdicts = {}
+        self._replies = {}
+        for name in merged:
+            self._compile(name, merged[name], merged[DEFAULT_LOCALE])
+        self.render_status = lru_cache(cache_size)(self._render_status)
+        self.render_error = lru_cache(cache_size)(self._render_error)
+
+    def _compile(self, locale, templates, defaults):
+        """Компилирует шаблоны одного языка."""
+        status_template = templates.get('status', defaults['status'])
+        verdicts = dict(defaults['verdicts'], **templates.get('verdicts', {}))
+        for status, verdict in verdicts.items():
+            code = HomeworkStatus.from_api(status)
+            if code is HomeworkStatus.UNKNOWN:
+                raise MessageTemplateError(
+                    f'Неизвестный статус {status!r} в шаблонах {locale!r}.'
+                )
+            self._status[locale, code] = CompiledTemplate(
+                status_template, ('homework_name',), verdict=verdict
+            )
+            self._verdicts[locale, code] = verdict
+        self._error[locale] = CompiledTemplate(
+            templates.get('error', defaults['error']), ('error',)
+        )
+        self._digest[locale] = CompiledTemplate(
+            templates.get('digest', defaults['digest']),
+            ('error', 'count', 'minutes')
+        )
+        replies = {
+            **REPLY_TEMPLATES,
+            **defaults.get('replies', {}),
+            **templates.get('replies', {}),
+        }
+        for name, template in replies.items():
+            if name not in REPLY_TEMPLATES:
+                raise MessageTemplateError(
+                    f'Неизвестный ответ {name!r} в шаблонах {locale!r}.'
+                )
+            self._replies[locale, name] = CompiledTemplate(
+                template, REPLY_FIELDS.get(name, ())
+            )
+
+    def knows(self, status):
+        """Проверяет, есть ли шаблон для кода статуса."""
+        return (self.locale, status) in self._status
+
+    def _render_status(self, homework_name, status, locale=None):
+        """Возвращает сообщение об изменении статуса работы."""
+        template = self._status.get((locale or self.locale, status))
+        if template is None:
+            template = self._status[self.locale, status]
+        return template.render(homework_name)
+
+    def _render_error(self, error, locale=None):
+        """Возвращает сообщение о сбое по тексту ошибки."""
+        template = self._error.get(locale or self.locale)
+        if template is None:
+            template = self._error[self.locale]
+        return template.render(error)
+
+    def verdict(self, status, locale=None):
+        """Возвращает текст вердикта по коду статуса или None."""
+        verdict = self._verdicts.get((locale or self.locale, status))
+        if verdict is None:
+            verdict = self._verdicts.get((self.locale, status))
+        return verdict
+
+    def render_reply(self, name, *values, locale=None):
+        """
+        Возвращает ответ на команду бота по имени шаблона.
+        Значения полей передаются в порядке `REPLY_FIELDS`.
+        """
+        template = self._replies.get((locale or self.locale, name))
+        if template is None:
+            template = self._replies[self.locale, name]
+        return template.render(*values)
+
+    def render_digest(self, entries, period, locale=None):
+        """
+        Возвращает сводку повторов сбоев.
+        `entries` - пары (текст ошибки, число повторов),
+        `period` - длительность сводки в секундах.
+        """
+        template = self._digest.get(locale or self.locale)
+        if template is None:
+            template = self._digest[self.locale]
+        minutes = max(round(period / 60), 1)
+        return '\n'.join(
+            template.render(error, count, minutes)
+            for error, count in entries
+        )
+
+
+def load_renderer(verdicts, path=MESSAGE_TEMPLATES_FILE, locale=None):
+    """Функция создаёт `MessageRenderer` с шаблонами из файла."""
+    templates = load_templates(path) if path else None
+    return MessageRenderer(verdicts, templates, locale or MESSAGE_LOCALE)
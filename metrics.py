@@ -0,0 +1,318 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf')
+)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    labels = ','.join(
+        f'{name}="{str(value)}"' for name, value in pairs
+    )
+    return f'{{{labels}}}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Базовая метрика с необязательными метками."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """Создаёт значение метрики для набора меток."""
+
+    def labels(self, *values):
+        """Возвращает метрику для заданных значений меток."""
+        values = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._new_child()
+                self._children[values] = child
+            return child
+
+    def _default(self):
+        return self._children[()]
+
+    def collect(self):
+        """Возвращает строки метрики в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            lines.extend(child.collect(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterValue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def collect(self, name, labelnames, values):
+        labels = _format_labels(labelnames, values)
+        return [f'{name}{labels} {_format_value(self.value)}']
+
+
+class _GaugeValue(_CounterValue):
+    def __init__(self):
+        super().__init__()
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def collect(self, name, labelnames, values):
+        if self._function is not None:
+            self.value = self._function()
+        return super().collect(name, labelnames, values)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def collect(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            labels = _format_labels(
+                labelnames, values, [('le', _format_value(bound))]
+            )
+            lines.append(f'{name}_bucket{labels} {cumulative}')
+        labels = _format_labels(labelnames, values)
+        lines.append(f'{name}_sum{labels} {_format_value(self.sum)}')
+        lines.append(f'{name}_count{labels} {self.count}')
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        """Увеличивает счётчик."""
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    """Текущее значение; может вычисляться функцией при сборе."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value):
+        """Устанавливает значение."""
+        self._default().set(value)
+
+    def set_function(self, function):
+        """Задаёт функцию, вычисляющую значение при сборе метрик."""
+        self._default().set_function(function)
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(buckets)
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        """Учитывает наблюдение."""
+        self._default().observe(value)
+
+    def time(self):
+        """Контекстный менеджер, замеряющий длительность блока."""
+        return self._default().time()
+
+
+class Registry:
+    """Реестр метрик процесса."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в реестр."""
+        with self._lock:
+            self._metrics.append(metric)
+
+    def exposition(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+POLLS = Counter(
+    'homework_bot_polls_total', 'Запросы к API домашки.'
+)
+API_ERRORS = Counter(
+    'homework_bot_api_errors_total',
+    'Сбои цикла опроса по классу исключения.',
+    ('error',)
+)
+API_REQUEST_SECONDS = Histogram(
+    'homework_bot_api_request_seconds',
+    'Длительность HTTP-запроса к API домашки.'
+)
+JSON_DECODE_SECONDS = Histogram(
+    'homework_bot_json_decode_seconds',
+    'Длительность разбора JSON ответа API домашки.',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, float('inf'))
+)
+SKIPPED_RESPONSES = Counter(
+    'homework_bot_skipped_responses_total',
+    'Ответы API, пропущенные без разбора: список работ не изменился.',
+    ('reason',)
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'homework_bot_response_cache_lookups_total',
+    'Обращения к кешу ответов API: hit, miss или shared.',
+    ('result',)
+)
+TELEGRAM_SENT = Counter(
+    'homework_bot_telegram_sent_total', 'Отправленные сообщения Telegram.'
+)
+TELEGRAM_FAILURES = Counter(
+    'homework_bot_telegram_failures_total',
+    'Неудачные попытки отправки в Telegram.'
+)
+TELEGRAM_SEND_SECONDS = Histogram(
+    'homework_bot_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram.'
+)
+DELIVERY_QUEUE_DEPTH = Gauge(
+    'homework_bot_delivery_queue_depth',
+    'Сообщения, ожидающие отправки в Telegram.'
+)
+ACTIVE_SUBSCRIPTIONS = Gauge(
+    'homework_bot_active_subscriptions', 'Подписки в реестре.'
+)
+
+
+@lru_cache(maxsize=None)
+def metrics_handler():
+    """
+    Функция возвращает класс обработчика запросов к /metrics.
+    `http.server` импортируется только при запуске сервера метрик.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдаёт метрики по адресу /metrics."""
+
+        def do_GET(self):
+            """Отвечает текстовым представлением реестра."""
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.registry.exposition().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            """Отключает журнал запросов."""
+
+    return MetricsHandler
+
+
+def start_metrics_server(port=None, host=METRICS_HOST, registry=REGISTRY):
+    """
+    Функция запускает HTTP-сервер метрик в фоновом потоке.
+    Если порт не задан ни аргументом, ни METRICS_PORT, сервер
+    не запускается и функция возвращает None.
+    """
+    port = METRICS_PORT if port is None else port
+    if port is None:
+        return None
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, int(port)), metrics_handler())
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info('Метрики доступны на http://%s:%s/metrics', host, port)
+    return server
@@ -0,0 +1,48 @@
+import os
+import random
+
+POLL_MIN_INTERVAL = float(os.getenv('POLL_MIN_INTERVAL', 120))
+POLL_MAX_INTERVAL = float(os.getenv('POLL_MAX_INTERVAL', 6 * 60 * 60))
+POLL_IDLE_AFTER = float(os.getenv('POLL_IDLE_AFTER', 24 * 60 * 60))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+
+REVIEWING_STATUS = 'reviewing'
+
+
+class PollingPolicy:
+    """
+    Адаптивный интервал опроса подписки.
+    Пока работа на проверке, подписка опрашивается с минимальным
+    интервалом, иначе - с базовым. За каждые `idle_after` секунд без
+    изменений интервал удваивается. Результат ограничен
+    [min_interval, max_interval] и размывается на долю `jitter`.
+    """
+
+    def __init__(
+        self, base,
+        min_interval=POLL_MIN_INTERVAL,
+        max_interval=POLL_MAX_INTERVAL,
+        idle_after=POLL_IDLE_AFTER,
+        jitter=POLL_JITTER,
+    ):
+        self.base = base
+        self.min_interval = min(min_interval, base)
+        self.max_interval = max(max_interval, base)
+        self.idle_after = idle_after
+        self.jitter = jitter
+
+    def next_interval(self, reviewing, idle_for):
+        """Возвращает интервал до следующего опроса в секундах."""
+        interval = self.min_interval if reviewing else self.base
+        idle_periods = int(max(idle_for, 0) // self.idle_after)
+        if idle_periods:
+            interval *= 2 ** min(idle_periods, 32)
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        if self.jitter:
+            interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        return interval
+
+
+def has_reviewing(statuses):
+    """Функция проверяет, есть ли среди статусов работа на проверке."""
+    return any(status == REVIEWING_STATUS for _, status in statuses.items())
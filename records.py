@@ -0,0 +1,65 @@
+from enum import IntEnum
+
+
+class HomeworkStatus(IntEnum):
+    """
+    Код статуса домашней работы.
+    Коды сравниваются как целые числа, а в API и хранилище
+    статус по-прежнему передаётся строкой из `HOMEWORK_VERDICTS`.
+    """
+
+    UNKNOWN = 0
+    REVIEWING = 1
+    APPROVED = 2
+    REJECTED = 3
+
+    @property
+    def api_name(self):
+        """Название статуса в ответе API."""
+        return self.name.lower()
+
+    @classmethod
+    def from_api(cls, status):
+        """Возвращает код статуса из ответа API или UNKNOWN."""
+        if isinstance(status, cls):
+            return status
+        if not isinstance(status, str):
+            return cls.UNKNOWN
+        return STATUS_CODES.get(status, cls.UNKNOWN)
+
+
+STATUS_CODES = {
+    status.api_name: status
+    for status in HomeworkStatus
+    if status is not HomeworkStatus.UNKNOWN
+}
+
+
+class Homework:
+    """
+    Компактная запись о домашней работе.
+    Хранит только поля, нужные для уведомления. Статус хранится
+    кодом `HomeworkStatus`, отсутствующий статус - значением None.
+    """
+
+    __slots__ = ('id', 'name', 'status')
+
+    def __init__(self, id, name, status):
+        self.id = id
+        self.name = name
+        if status is not None:
+            status = HomeworkStatus.from_api(status)
+        self.status = status
+
+    @classmethod
+    def from_dict(cls, homework):
+        """Создаёт запись из словаря работы в ответе API."""
+        return cls(
+            homework.get('id'),
+            homework.get('homework_name'),
+            homework.get('status')
+        )
+
+    def __repr__(self):
+        status = None if self.status is None else self.status.name
+        return f'Homework(id={self.id!r}, status={status})'
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from homework import make_headers, request_homework_statuses
+from metrics import RESPONSE_CACHE_LOOKUPS
+
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 60))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+
+_MISSING = object()
+
+
+class _Flight:
+    """Загрузка значения, которую ждут остальные обращения к ключу."""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+        self.error = None
+
+
+class ReadThroughCache:
+    """
+    Кеш со сквозным чтением, сроком жизни записей и вытеснением LRU.
+    Промах загружает значение через переданную функцию; одновременные
+    обращения к тому же ключу ждут эту загрузку, а не повторяют её.
+    Ошибка загрузки не кешируется и достаётся всем ожидавшим,
+    а если загрузку прервало исключение вроде `SystemExit`,
+    ожидавшие загружают значение заново.
+    С `ttl=0` кеш отключён и каждое обращение вызывает загрузку.
+    """
+
+    def __init__(
+        self, ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE,
+        clock=time.monotonic
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, load):
+        """Возвращает свежее значение ключа, при промахе вызывая `load`."""
+        if self.ttl <= 0:
+            return load()
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                RESPONSE_CACHE_LOOKUPS.labels('hit').inc()
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            RESPONSE_CACHE_LOOKUPS.labels('shared').inc()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.value is _MISSING:
+                return self.get(key, load)
+            return flight.value
+        RESPONSE_CACHE_LOOKUPS.labels('miss').inc()
+        return self._load(key, load, flight)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _load(self, key, load, flight):
+        try:
+            flight.value = load()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.value is not _MISSING:
+                    self._store(key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Удаляет запись ключа, следующее обращение загрузит её заново."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def read_homework_statuses(
+    subscription, transport=None, validator=None, cache=None
+):
+    """
+    Функция запрашивает статусы работ подписки через кеш ответов.
+    Плановый опрос и запрос пользователя в пределах `ttl` кеша
+    получают один и тот же ответ, так что API опрашивается не чаще
+    раза за это время на токен. Ответ зависит от `from_date`,
+    поэтому ключ кеша - токен вместе с курсором подписки.
+    Без `cache` запрос идёт напрямую.
+    """
+    def load():
+        return request_homework_statuses(
+            make_headers(subscription.token), subscription.cursor,
+            transport, validator=validator
+        )
+
+    if cache is None:
+        return load()
+    return cache.get((subscription.token, subscription.cursor), load)
@@ -0,0 +1,370 @@
+import collections
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from breaker import HALF_OPEN, OPEN, CircuitBreaker
+from commands import BOT_COMMANDS, CommandListener
+from delivery import TELEGRAM_GLOBAL_RATE, DeliveryQueue
+from exceptions import (
+    APIResponseKeyError,
+    HomeworkNotFoundError,
+    HomeworkStatusError,
+    TokenNotFoundError,
+)
+from homework import (
+    RETRY_PERIOD,
+    deliver_message,
+    find_changes,
+    get_next_timestamp,
+    load_environment,
+    parse_record_status,
+    report_error,
+    send_error_digest,
+)
+from log_config import setup_logging
+from metrics import (
+    ACTIVE_SUBSCRIPTIONS,
+    DELIVERY_QUEUE_DEPTH,
+    start_metrics_server,
+)
+from polling_policy import PollingPolicy, has_reviewing
+from response_cache import ReadThroughCache, read_homework_statuses
+from state import open_state_store
+from subscriptions import load_subscriptions
+from tracing import TRACER
+from transport import HTTPTransport
+
+logger = logging.getLogger(__name__)
+
+
+def process_response(bot, subscription, response):
+    """
+    Функция обрабатывает ответ API для подписки.
+    После обработки курсор подписки сдвигается на `current_date`,
+    так что следующий запрос вернёт только новые изменения,
+    а признаки ответа запоминаются для условного запроса.
+    Работа с неизвестным статусом или без нужных ключей не прерывает
+    обработку: о ней сообщается через дедупликатор ошибок подписки,
+    а остальные работы ответа обрабатываются как обычно.
+    """
+    next_timestamp = get_next_timestamp(response, subscription.cursor)
+    try:
+        changes = find_changes(subscription.statuses, response)
+    except HomeworkNotFoundError:
+        logger.debug('Статус работы не изменился.')
+    else:
+        if not changes:
+            logger.debug('Статус работы не изменился.')
+        for key, status, homework in changes:
+            try:
+                with TRACER.span('parse_status'):
+                    message = parse_record_status(
+                        homework, subscription.locale
+                    )
+            except (HomeworkStatusError, APIResponseKeyError) as error:
+                report_error(bot, subscription, error)
+                continue
+            deliver_message(bot, subscription.chat_id, message)
+            subscription.statuses.update(key, status)
+            subscription.last_change_at = time.time()
+    subscription.cursor = next_timestamp
+    subscription.validator.commit()
+
+
+def poll_subscription(bot, subscription, transport=None, cache=None):
+    """
+    Функция выполняет один цикл опроса API для подписки.
+    С `cache` свежий ответ, уже полученный по запросу пользователя,
+    используется повторно. Возвращает возникшую ошибку или None.
+    """
+    with TRACER.subscription(subscription.id):
+        try:
+            with TRACER.span('poll'):
+                response = read_homework_statuses(
+                    subscription, transport,
+                    validator=subscription.validator, cache=cache
+                )
+                process_response(bot, subscription, response)
+        except Exception as error:
+            report_error(bot, subscription, error)
+            return error
+    return None
+
+
+class Scheduler:
+    """
+    Планировщик опроса множества подписок в одном процессе.
+    Очередь подписок хранится в куче по времени следующего опроса,
+    поэтому на каждую подписку приходится одна запись кучи.
+    Интервал до следующего опроса каждой подписки задаёт `policy`,
+    а общий для эндпоинта `breaker` приостанавливает опрос при сбоях API.
+    Подписки, добавленные во время работы через `subscribe`,
+    принимаются в очередь потоком опроса при ближайшем `pop_due`.
+    Другие потоки могут выполнить код в потоке опроса через
+    `call_soon` и остановить цикл через `stop`: текущий опрос
+    при этом доводится до конца.
+    Ответы API проходят через `cache`, общий с командами бота.
+    """
+
+    def __init__(
+        self, bot, registry, period=RETRY_PERIOD, transport=None, store=None,
+        policy=None, breaker=None, cache=None
+    ):
+        self.bot = bot
+        self.registry = registry
+        self.transport = transport
+        self.cache = cache
+        self.store = store
+        self.period = period
+        self.policy = policy or PollingPolicy(period)
+        self.breaker = breaker or CircuitBreaker()
+        self._queue = []
+        self._entries = {}
+        self._incoming = collections.deque()
+        self._calls = collections.deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._counter = itertools.count()
+        self._restore()
+        self._stagger()
+
+    def _restore(self):
+        """Восстанавливает состояние подписок из хранилища."""
+        if self.store is None:
+            return
+        for subscription in self.registry:
+            subscription.restore(self.store.load(subscription.id))
+
+    def _stagger(self):
+        """Распределяет первые опросы подписок равномерно по периоду."""
+        now = time.monotonic()
+        step = self.period / max(len(self.registry), 1)
+        for index, subscription in enumerate(self.registry):
+            self.schedule(subscription.token, now + index * step)
+
+    def schedule(self, token, due):
+        """
+        Ставит подписку в очередь на момент `due`.
+        Прежняя запись подписки в очереди, если она есть, устаревает.
+        """
+        entry = next(self._counter)
+        self._entries[token] = entry
+        heapq.heappush(self._queue, (due, entry, token))
+
+    def subscribe(self, token, chat_id, locale=None):
+        """
+        Добавляет подписку во время работы и будит цикл опроса.
+        Метод можно вызывать из другого потока: состояние подписки
+        восстановит и поставит её в очередь поток опроса.
+        """
+        is_new = token not in self.registry
+        subscription = self.registry.add(token, chat_id, locale=locale)
+        if is_new:
+            self._incoming.append(token)
+            self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, token):
+        """Удаляет подписку; её запись в очереди будет пропущена."""
+        return self.registry.remove(token)
+
+    def _accept_incoming(self, now):
+        """Восстанавливает и ставит в очередь добавленные подписки."""
+        while self._incoming:
+            subscription = self.registry.get(self._incoming.popleft())
+            if subscription is None:
+                continue
+            if self.store is not None:
+                subscription.restore(self.store.load(subscription.id))
+            self.schedule(subscription.token, now)
+
+    def admit(self, now):
+        """
+        Возвращает, сколько подписок можно опросить сейчас.
+        None - без ограничений, 1 - только пробный запрос.
+        """
+        if not self.breaker.allow(now):
+            return 0
+        return 1 if self.breaker.state == HALF_OPEN else None
+
+    def pop_due(self, now, limit=None):
+        """Извлекает из очереди подписки, срок опроса которых наступил."""
+        self._accept_incoming(now)
+        due_subscriptions = []
+        while (
+            self._queue and self._queue[0][0] <= now
+            and (limit is None or len(due_subscriptions) < limit)
+        ):
+            due, entry, token = heapq.heappop(self._queue)
+            if self._entries.get(token) != entry:
+                continue
+            del self._entries[token]
+            subscription = self.registry.get(token)
+            if subscription is not None:
+                due_subscriptions.append((subscription, due))
+        return due_subscriptions
+
+    def record_result(self, error, now):
+        """Передаёт результат опроса автомату и разносит отложенные опросы."""
+        if self.breaker.record(error, now):
+            logger.info('API снова доступен, опрос возобновлён.')
+            self._spread_overdue(now)
+
+    def _spread_overdue(self, now):
+        """Распределяет просроченные опросы по окну восстановления."""
+        overdue = self.pop_due(now)
+        step = self.breaker.recovery_window / max(len(overdue), 1)
+        for index, (subscription, _) in enumerate(overdue):
+            self.schedule(subscription.token, now + index * step)
+
+    def complete(self, subscription, due, now):
+        """
+        Сохраняет состояние подписки и планирует следующий опрос.
+        Если пора, в чат подписки уходит сводка подавленных сбоев.
+        """
+        send_error_digest(self.bot, subscription)
+        if self.store is not None:
+            self.store.save(subscription.id, subscription.snapshot())
+        interval = self.policy.next_interval(
+            has_reviewing(subscription.statuses),
+            time.time() - subscription.last_change_at
+        )
+        self.schedule(subscription.token, max(due + interval, now))
+
+    def run_pending(self, now=None):
+        """Опрашивает все подписки, срок опроса которых наступил."""
+        now = time.monotonic() if now is None else now
+        limit = self.admit(now)
+        if limit == 0:
+            return 0
+        polled = []
+        for subscription, due in self.pop_due(now, limit):
+            if self.breaker.state == OPEN:
+                self.schedule(subscription.token, due)
+                continue
+            error = poll_subscription(
+                self.bot, subscription, self.transport, self.cache
+            )
+            self.record_result(error, now)
+            polled.append((subscription, due))
+        for subscription, due in polled:
+            self.complete(subscription, due, now)
+        return len(polled)
+
+    def next_delay(self):
+        """Возвращает время до ближайшего опроса в секундах."""
+        now = time.monotonic()
+        if not self._queue:
+            return self.period
+        return max(self._queue[0][0] - now, self.breaker.retry_in(now), 0)
+
+    def wait(self):
+        """Ждёт ближайшего опроса, добавления подписки или вызова."""
+        if self._incoming or self._calls or self._stopping.is_set():
+            delay = 0
+        else:
+            delay = self.next_delay()
+        self._wakeup.wait(delay)
+        self._wakeup.clear()
+
+    def call_soon(self, func, *args):
+        """
+        Выполняет `func(*args)` в потоке опроса между опросами.
+        Метод можно вызывать из другого потока. Возвращает событие,
+        которое установится, когда вызов выполнен.
+        """
+        done = threading.Event()
+        self._calls.append((func, args, done))
+        self._wakeup.set()
+        return done
+
+    def _run_calls(self):
+        """Выполняет вызовы, переданные через `call_soon`."""
+        while self._calls:
+            func, args, done = self._calls.popleft()
+            try:
+                func(*args)
+            except Exception as error:
+                logger.error('Сбой вызова в потоке опроса: %s', error)
+            finally:
+                done.set()
+
+    def stop(self):
+        """Останавливает цикл опроса после текущего опроса."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def run_forever(self):
+        """Цикл опроса подписок до вызова `stop`."""
+        while not self._stopping.is_set():
+            self._run_calls()
+            self.run_pending()
+            self.wait()
+
+
+def load_runtime():
+    """
+    Функция читает токен бота и реестр подписок.
+    При ошибке конфигурации возвращает None.
+    """
+    telegram_token = os.getenv('TELEGRAM_TOKEN')
+    try:
+        if telegram_token is None:
+            raise TokenNotFoundError(
+                'Отсутствует обязательная переменная окружения: '
+                'TELEGRAM_TOKEN'
+            )
+        return telegram_token, load_subscriptions()
+    except (TokenNotFoundError, ValueError) as error:
+        logger.critical(error)
+        return None
+
+
+def run_scheduler(
+    telegram_token, registry, global_rate=TELEGRAM_GLOBAL_RATE,
+    commands=BOT_COMMANDS, on_start=None
+):
+    """
+    Функция опрашивает подписки реестра до остановки процесса.
+    `global_rate` ограничивает частоту отправки в Telegram,
+    `commands` включает приём команд подписки от пользователей.
+    `on_start` вызывается с планировщиком перед началом опроса.
+    После `Scheduler.stop` очередь отправки и хранилище состояния
+    закрываются как обычно, так что отложенная запись не теряется.
+    """
+    from telebot import TeleBot
+
+    bot = TeleBot(token=telegram_token)
+    logger.info('Запущен опрос подписок: %d.', len(registry))
+    with HTTPTransport() as transport, open_state_store() as store:
+        with DeliveryQueue(bot, global_rate=global_rate) as outbox:
+            ACTIVE_SUBSCRIPTIONS.set_function(registry.__len__)
+            DELIVERY_QUEUE_DEPTH.set_function(outbox.__len__)
+            scheduler = Scheduler(
+                outbox, registry, transport=transport, store=store,
+                cache=ReadThroughCache()
+            )
+            if commands:
+                CommandListener(bot, scheduler, outbox).start()
+            if on_start is not None:
+                on_start(scheduler)
+            scheduler.run_forever()
+
+
+def main():
+    """Запуск опроса всех подписок в одном процессе."""
+    runtime = load_runtime()
+    if runtime is None:
+        return
+    run_scheduler(*runtime)
+
+
+if __name__ == '__main__':
+    load_environment()
+    setup_logging()
+    start_metrics_server()
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite')
+STATE_DB = os.getenv('STATE_DB', 'homework_bot.sqlite3')
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 30))
+STATE_BATCH_SIZE = int(os.getenv('STATE_BATCH_SIZE', 500))
+
+SubscriptionState = namedtuple(
+    'SubscriptionState',
+    ('cursor', 'statuses', 'last_error', 'last_change_at'),
+    defaults=(None,)
+)
+
+
+class StateStore(ABC):
+    """
+    Хранилище состояния подписок.
+    Хранит курсор, статусы, последнюю ошибку и время последнего
+    изменения статуса.
+    """
+
+    @abstractmethod
+    def load(self, key):
+        """Возвращает сохранённое состояние подписки или None."""
+
+    @abstractmethod
+    def save(self, key, state):
+        """Сохраняет состояние подписки."""
+
+    def flush(self):
+        """Записывает отложенные изменения."""
+
+    def close(self):
+        """Записывает отложенные изменения и освобождает ресурсы."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище состояния в памяти процесса."""
+
+    def __init__(self):
+        self._states = {}
+
+    def load(self, key):
+        """Возвращает сохранённое состояние подписки или None."""
+        return self._states.get(key)
+
+    def save(self, key, state):
+        """Сохраняет состояние подписки."""
+        self._states[key] = state._replace(statuses=dict(state.statuses))
+
+
+class SqliteStateStore(StateStore):
+    """
+    Хранилище состояния в SQLite с отложенной записью.
+    Изменения копятся в памяти и записываются одной транзакцией,
+    когда их набирается `batch_size` или проходит `flush_interval`
+    секунд с прошлой записи.
+    """
+
+    def __init__(
+        self, path=STATE_DB,
+        flush_interval=STATE_FLUSH_INTERVAL, batch_size=STATE_BATCH_SIZE
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS subscription_state ('
+            'key TEXT PRIMARY KEY, cursor INTEGER, '
+            'statuses TEXT, last_error TEXT, last_change_at REAL)'
+        )
+        columns = {
+            row[1] for row in self._connection.execute(
+                'PRAGMA table_info(subscription_state)'
+            )
+        }
+        if 'last_change_at' not in columns:
+            self._connection.execute(
+                'ALTER TABLE subscription_state '
+                'ADD COLUMN last_change_at REAL'
+            )
+        self._connection.commit()
+
+    def load(self, key):
+        """Возвращает сохранённое состояние подписки или None."""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending._replace(statuses=dict(pending.statuses))
+            row = self._connection.execute(
+                'SELECT cursor, statuses, last_error, last_change_at '
+                'FROM subscription_state WHERE key = ?',
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        cursor, statuses, last_error, last_change_at = row
+        return SubscriptionState(
+            cursor, dict(json.loads(statuses)), last_error, last_change_at
+        )
+
+    def save(self, key, state):
+        """Откладывает запись состояния подписки."""
+        with self._lock:
+            self._pending[key] = state._replace(
+                statuses=list(state.statuses.items())
+            )
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Записывает отложенные изменения одной транзакцией."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            if not pending:
+                return
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO subscription_state '
+                    '(key, cursor, statuses, last_error, last_change_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (
+                        (
+                            key, state.cursor,
+                            json.dumps(state.statuses, ensure_ascii=False),
+                            state.last_error, state.last_change_at,
+                        )
+                        for key, state in pending.items()
+                    )
+                )
+
+    def close(self):
+        """Записывает отложенные изменения и закрывает базу."""
+        self.flush()
+        self._connection.close()
+
+
+def open_state_store(backend=None, path=None):
+    """
+    Функция открывает хранилище состояния.
+    По умолчанию используется SQLite по пути STATE_DB,
+    `STATE_BACKEND=memory` включает хранилище в памяти.
+    """
+    backend = backend or STATE_BACKEND
+    if backend == 'memory':
+        return MemoryStateStore()
+    return SqliteStateStore(path or STATE_DB)
@@ -0,0 +1,85 @@
+import sys
+
+from records import STATUS_CODES, HomeworkStatus
+
+_MISSING = object()
+
+
+def encode_status(status):
+    """
+    Функция возвращает код статуса для хранения в индексе.
+    Известные статусы хранятся кодами `HomeworkStatus`,
+    неизвестные строки - интернированными строками.
+    """
+    if isinstance(status, HomeworkStatus):
+        return status
+    if isinstance(status, str):
+        return STATUS_CODES.get(status) or sys.intern(status)
+    return status
+
+
+def decode_status(status):
+    """Функция возвращает статус в виде строки из ответа API."""
+    if isinstance(status, HomeworkStatus):
+        return status.api_name
+    return status
+
+
+def homework_key(homework):
+    """Функция возвращает ключ работы в индексе: `id` или название."""
+    key = homework.get('id')
+    if key is None:
+        key = homework.get('homework_name')
+    return key
+
+
+class StatusIndex:
+    """
+    Индекс последних отправленных статусов работ.
+    Статусы хранятся кодами `HomeworkStatus`, поэтому индекс держит
+    на каждую работу только ключ и ссылку на общий член перечисления,
+    а сравнение статусов сводится к сравнению целых чисел.
+    Наружу статусы отдаются строками, как в ответе API.
+    """
+
+    __slots__ = ('_statuses',)
+
+    def __init__(self, statuses=None):
+        self._statuses = {}
+        for key, status in (statuses or {}).items():
+            self.update(key, status)
+
+    def __len__(self):
+        return len(self._statuses)
+
+    def __contains__(self, key):
+        return key in self._statuses
+
+    def get(self, key):
+        """Возвращает последний отправленный статус работы."""
+        return decode_status(self._statuses.get(key))
+
+    def items(self):
+        """Возвращает пары (ключ работы, статус)."""
+        return [
+            (key, decode_status(status))
+            for key, status in self._statuses.items()
+        ]
+
+    def update(self, key, status):
+        """Запоминает отправленный статус работы."""
+        self._statuses[key] = encode_status(status)
+
+    def changes(self, homeworks):
+        """
+        Функция за один проход находит работы с изменившимся статусом.
+        Возвращает тройки (ключ, статус, работа). Индекс не меняется:
+        статус фиксируется вызовом `update` после отправки сообщения.
+        """
+        changed = []
+        for homework in homeworks:
+            key = homework_key(homework)
+            status = homework.get('status')
+            if self._statuses.get(key, _MISSING) != encode_status(status):
+                changed.append((key, status, homework))
+        return changed
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import time
+
+from conditional import ResponseValidator
+from error_dedup import ErrorDeduplicator
+from exceptions import SubscriptionConfigError, TokenNotFoundError
+from state import SubscriptionState
+from status_index import StatusIndex
+
+
+def subscription_id(token):
+    """
+    Функция возвращает идентификатор подписки.
+    Идентификатор получается из хеша токена, чтобы сам токен
+    не попадал в хранилище состояния и логи.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class Subscription:
+    """
+    Состояние наблюдения за работами одного студента.
+    Запись объявляет `__slots__`, так что на подписку не заводится
+    отдельный словарь атрибутов.
+    """
+
+    __slots__ = (
+        'id', 'token', 'chat_id', 'cursor', 'statuses', 'errors',
+        'last_change_at', 'locale', 'validator',
+    )
+
+    def __init__(self, token, chat_id, cursor=None, locale=None):
+        self.id = subscription_id(token)
+        self.token = token
+        self.chat_id = chat_id
+        self.cursor = int(time.time()) if cursor is None else cursor
+        self.statuses = StatusIndex()
+        self.errors = ErrorDeduplicator()
+        self.last_change_at = time.time()
+        self.locale = locale
+        self.validator = ResponseValidator()
+
+    @property
+    def last_error(self):
+        """Отпечаток последней ошибки, о которой сообщено в чат."""
+        return self.errors.last_fingerprint
+
+    @property
+    def last_error_message(self):
+        """Текст последней ошибки с запуска бота или None."""
+        return self.errors.last_message
+
+    def snapshot(self):
+        """Возвращает состояние подписки для сохранения."""
+        return SubscriptionState(
+            self.cursor, dict(self.statuses.items()), self.last_error,
+            self.last_change_at
+        )
+
+    def restore(self, state):
+        """Восстанавливает состояние подписки, если оно сохранено."""
+        if state is None:
+            return
+        self.cursor = state.cursor
+        self.statuses = StatusIndex(state.statuses)
+        self.errors.restore(state.last_error)
+        if state.last_change_at is not None:
+            self.last_change_at = state.last_change_at
+
+    def __repr__(self):
+        return f'Subscription(chat_id={self.chat_id!r})'
+
+
+class SubscriptionRegistry:
+    """Реестр подписок: токен Практикума -> подписка."""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._chats = {}
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def __iter__(self):
+        return iter(self._subscriptions.values())
+
+    def __contains__(self, token):
+        return token in self._subscriptions
+
+    def get(self, token):
+        """Возвращает подписку по токену или None."""
+        return self._subscriptions.get(token)
+
+    def for_chat(self, chat_id):
+        """Возвращает подписки, уведомления которых идут в чат."""
+        return [
+            self._subscriptions[token]
+            for token in self._chats.get(chat_id, ())
+        ]
+
+    def add(self, token, chat_id, cursor=None, locale=None):
+        """
+        Добавляет подписку или обновляет чат существующей.
+        Язык существующей подписки меняется, только если он передан.
+        """
+        subscription = self._subscriptions.get(token)
+        if subscription is None:
+            subscription = Subscription(token, chat_id, cursor, locale)
+            self._subscriptions[token] = subscription
+        else:
+            self._forget_chat(subscription)
+            subscription.chat_id = chat_id
+            if locale is not None:
+                subscription.locale = locale
+        self._chats.setdefault(chat_id, set()).add(token)
+        return subscription
+
+    def remove(self, token):
+        """Удаляет подписку и возвращает её, если она была."""
+        subscription = self._subscriptions.pop(token, None)
+        if subscription is not None:
+            self._forget_chat(subscription)
+        return subscription
+
+    def _forget_chat(self, subscription):
+        tokens = self._chats.get(subscription.chat_id)
+        if tokens is not None:
+            tokens.discard(subscription.token)
+            if not tokens:
+                del self._chats[subscription.chat_id]
+
+
+def save_subscriptions(registry, path):
+    """
+    Функция сохраняет реестр подписок в JSON-файл.
+    Формат тот же, что читает `load_subscriptions`, файл
+    заменяется атомарно.
+    """
+    entries = []
+    for subscription in registry:
+        entry = {'token': subscription.token, 'chat_id': subscription.chat_id}
+        if subscription.locale is not None:
+            entry['locale'] = subscription.locale
+        entries.append(entry)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(entries, file, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def load_subscriptions(path=None, token=None, chat_id=None):
+    """
+    Функция загружает реестр подписок.
+    Подписки читаются из JSON-файла со списком объектов
+    `{"token": ..., "chat_id": ..., "locale": ...}`, язык сообщений
+    указывать не обязательно. Если файл не задан, реестр
+    состоит из единственной пары PRACTICUM_TOKEN/TELEGRAM_CHAT_ID.
+    """
+    registry = SubscriptionRegistry()
+    path = path or os.getenv('SUBSCRIPTIONS_FILE')
+    if path:
+        try:
+            with open(path, encoding='utf-8') as file:
+                entries = json.load(file)
+            for entry in entries:
+                registry.add(
+                    str(entry['token']), str(entry['chat_id']),
+                    locale=entry.get('locale')
+                )
+        except (OSError, ValueError, TypeError, KeyError) as error:
+            raise SubscriptionConfigError(
+                f'Не удалось загрузить подписки из {path}: {error}'
+            ) from error
+    else:
+        token = token or os.getenv('PRACTICUM_TOKEN')
+        chat_id = chat_id or os.getenv('TELEGRAM_CHAT_ID')
+        if token and chat_id:
+            registry.add(token, chat_id)
+
+    if not registry:
+        raise TokenNotFoundError('Не задано ни одной подписки.')
+    return registry
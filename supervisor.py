@@ -0,0 +1,411 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from delivery import TELEGRAM_GLOBAL_RATE, DeliveryQueue
+from homework import load_environment
+from log_config import setup_logging, stop_logging
+from metrics import METRICS_PORT, start_metrics_server
+from scheduler import load_runtime, run_scheduler
+from subscriptions import SubscriptionRegistry
+
+logger = logging.getLogger(__name__)
+
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', os.cpu_count() or 1))
+WORKER_RESTART_DELAY = float(os.getenv('WORKER_RESTART_DELAY', 1))
+WORKER_MAX_RESTART_DELAY = float(os.getenv('WORKER_MAX_RESTART_DELAY', 60))
+WORKER_STABLE_AFTER = float(os.getenv('WORKER_STABLE_AFTER', 60))
+WORKER_STOP_TIMEOUT = float(os.getenv('WORKER_STOP_TIMEOUT', 30))
+WORKER_RESHARD_TIMEOUT = float(os.getenv('WORKER_RESHARD_TIMEOUT', 60))
+SUPERVISOR_CHECK_INTERVAL = float(
+    os.getenv('SUPERVISOR_CHECK_INTERVAL', 1)
+)
+WORKER_START_METHOD = os.getenv('WORKER_START_METHOD', 'spawn')
+SHARD_REPLICAS = 100
+WORKER_LOG_FORMAT = '%(levelname)s - %(asctime)s - %(process)d - %(message)s'
+
+
+def _ring_hash(key):
+    """Функция возвращает позицию ключа на кольце."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Кольцо согласованного хеширования подписок по шардам.
+    Каждый шард занимает `replicas` точек кольца, поэтому при смене
+    числа шардов переезжает лишь около 1/N подписок.
+    """
+
+    def __init__(self, shards, replicas=SHARD_REPLICAS):
+        if shards < 1:
+            raise ValueError('Число шардов должно быть положительным.')
+        self.shards = shards
+        points = sorted(
+            (_ring_hash(f'{shard}:{replica}'), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, key):
+        """Возвращает номер шарда, которому принадлежит ключ."""
+        index = bisect.bisect(self._hashes, _ring_hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+def shard_registry(registry, ring, shard):
+    """
+    Функция возвращает реестр подписок одного шарда.
+    Подписка распределяется по идентификатору - хешу токена Практикума.
+    """
+    shard_subscriptions = SubscriptionRegistry()
+    for subscription in registry:
+        if ring.shard_for(subscription.id) == shard:
+            shard_subscriptions.add(
+                subscription.token, subscription.chat_id,
+                locale=subscription.locale
+            )
+    return shard_subscriptions
+
+
+def reshard(scheduler, registry, shard, shards):
+    """
+    Функция перераспределяет подписки воркера по новому кольцу.
+    В планировщике остаются подписки шарда `shard` из `shards`,
+    возвращается число переехавших подписок. Выполняется в потоке
+    опроса. Состояние отданных подписок
+    записывается в хранилище до возврата, чтобы их новый шард
+    продолжил с того же курсора; принятые подписки восстанавливают
+    состояние из хранилища при постановке в очередь.
+    """
+    wanted = shard_registry(registry, HashRing(shards), shard)
+    moved = 0
+    for subscription in list(scheduler.registry):
+        if subscription.token in wanted:
+            continue
+        scheduler.unsubscribe(subscription.token)
+        if scheduler.store is not None:
+            scheduler.store.save(subscription.id, subscription.snapshot())
+        moved += 1
+    if scheduler.store is not None:
+        scheduler.store.flush()
+    for subscription in wanted:
+        if subscription.token not in scheduler.registry:
+            scheduler.subscribe(
+                subscription.token, subscription.chat_id,
+                locale=subscription.locale
+            )
+            moved += 1
+    return moved
+
+
+def serve_control(control, scheduler, registry, shard):
+    """
+    Функция принимает от супервизора новое число шардов.
+    Подписки перераспределяются в потоке опроса, после чего
+    супервизору уходит подтверждение с тем же числом.
+    """
+    while True:
+        try:
+            shards = control.recv()
+        except (EOFError, OSError):
+            return
+        scheduler.call_soon(
+            _reshard_and_log, scheduler, registry, shard, shards
+        ).wait()
+        control.send(shards)
+
+
+def _reshard_and_log(scheduler, registry, shard, shards):
+    moved = reshard(scheduler, registry, shard, shards)
+    if isinstance(scheduler.bot, DeliveryQueue):
+        scheduler.bot.set_global_rate(TELEGRAM_GLOBAL_RATE / shards)
+    logger.info(
+        'Воркер шарда %d/%d: переехало подписок: %d.', shard, shards, moved
+    )
+
+
+def _exit_on_signal(signum, frame):
+    """Завершает воркер так, чтобы отработали блоки `with`."""
+    sys.exit(0)
+
+
+def run_shard(shard, shards, control=None):
+    """
+    Функция опрашивает подписки одного шарда в процессе-воркере.
+    Лимит отправки в Telegram делится между воркерами поровну,
+    сервер метрик воркера слушает порт METRICS_PORT + 1 + shard.
+    Воркер запускается в чистом интерпретаторе, поэтому журнал
+    настраивается в нём заново. Когда опрос запущен, SIGTERM
+    останавливает его после текущего опроса, а через `control`
+    супервизор меняет число шардов без перезапуска воркера.
+    """
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    listener = setup_logging(text_format=WORKER_LOG_FORMAT)
+
+    def on_start(scheduler):
+        signal.signal(
+            signal.SIGTERM, lambda signum, frame: scheduler.stop()
+        )
+        if control is not None:
+            threading.Thread(
+                target=serve_control,
+                args=(control, scheduler, registry, shard),
+                name='shard-control', daemon=True
+            ).start()
+
+    try:
+        runtime = load_runtime()
+        if runtime is None:
+            return
+        telegram_token, registry = runtime
+        if METRICS_PORT is not None:
+            start_metrics_server(int(METRICS_PORT) + 1 + shard)
+        logger.info('Воркер шарда %d/%d запущен.', shard, shards)
+        run_scheduler(
+            telegram_token, shard_registry(registry, HashRing(shards), shard),
+            global_rate=TELEGRAM_GLOBAL_RATE / shards, commands=False,
+            on_start=on_start,
+        )
+    finally:
+        stop_logging(listener)
+
+
+class Supervisor:
+    """
+    Супервизор процессов-воркеров, по одному на шард подписок.
+    Упавший воркер перезапускается с нарастающей паузой; пауза
+    сбрасывается, если воркер проработал `stable_after` секунд.
+    При смене числа воркеров работающие воркеры не перезапускаются:
+    через канал управления они получают новое число шардов и отдают
+    или принимают только переехавшие по кольцу подписки. При росте
+    новые воркеры запускаются после того, как старые отдали подписки
+    и записали их состояние, при сокращении лишние воркеры сначала
+    останавливаются. SIGTTIN и SIGTTOU добавляют и убирают воркер,
+    SIGHUP перезапускает воркеры, чтобы перечитать подписки.
+    Воркеры по умолчанию запускаются методом `spawn`: при `fork`
+    дочерний процесс наследует блокировки потока журнала супервизора
+    и может зависнуть на первой же записи.
+    """
+
+    def __init__(
+        self, processes=WORKER_PROCESSES, target=run_shard,
+        restart_delay=WORKER_RESTART_DELAY,
+        max_restart_delay=WORKER_MAX_RESTART_DELAY,
+        stable_after=WORKER_STABLE_AFTER,
+        start_method=WORKER_START_METHOD,
+        reshard_timeout=WORKER_RESHARD_TIMEOUT
+    ):
+        if processes < 1:
+            raise ValueError('Число воркеров должно быть положительным.')
+        self.processes = processes
+        self.target = target
+        self.context = multiprocessing.get_context(start_method)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.reshard_timeout = reshard_timeout
+        self._workers = {}
+        self._controls = {}
+        self._started_at = {}
+        self._crashes = {}
+        self._restart_at = {}
+        self._wanted = processes
+        self._reload = False
+        self._stopping = False
+
+    @property
+    def workers(self):
+        """Процессы-воркеры по номерам шардов."""
+        return dict(self._workers)
+
+    def _spawn(self, shard, now):
+        control, worker_control = self.context.Pipe()
+        process = self.context.Process(
+            target=self.target, args=(shard, self.processes, worker_control),
+            name=f'homework-shard-{shard}'
+        )
+        process.start()
+        worker_control.close()
+        self._close_control(shard)
+        self._controls[shard] = control
+        self._workers[shard] = process
+        self._started_at[shard] = now
+        self._restart_at.pop(shard, None)
+
+    def start(self, now=None):
+        """Запускает воркеры всех шардов."""
+        now = time.monotonic() if now is None else now
+        for shard in range(self.processes):
+            self._spawn(shard, now)
+        logger.info('Запущено воркеров: %d.', self.processes)
+
+    def check(self, now=None):
+        """
+        Перезапускает завершившиеся воркеры, если их пауза истекла.
+        Возвращает число перезапущенных воркеров.
+        """
+        now = time.monotonic() if now is None else now
+        restarted = 0
+        for shard, process in list(self._workers.items()):
+            if process.is_alive():
+                continue
+            if shard not in self._restart_at:
+                process.join()
+                if now - self._started_at[shard] >= self.stable_after:
+                    self._crashes[shard] = 0
+                crashes = self._crashes.get(shard, 0)
+                delay = min(
+                    self.restart_delay * 2 ** crashes, self.max_restart_delay
+                )
+                self._crashes[shard] = crashes + 1
+                self._restart_at[shard] = now + delay
+                logger.error(
+                    'Воркер шарда %d завершился с кодом %s, '
+                    'перезапуск через %s с.', shard, process.exitcode, delay
+                )
+            if now >= self._restart_at[shard]:
+                self._spawn(shard, now)
+                restarted += 1
+        return restarted
+
+    def _close_control(self, shard):
+        control = self._controls.pop(shard, None)
+        if control is not None:
+            control.close()
+
+    def _stop_shards(self, shards, timeout=WORKER_STOP_TIMEOUT):
+        """Останавливает воркеры шардов, дожидаясь сохранения состояния."""
+        processes = [
+            self._workers.pop(shard) for shard in shards
+            if shard in self._workers
+        ]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        for shard in shards:
+            self._close_control(shard)
+            self._restart_at.pop(shard, None)
+            self._crashes.pop(shard, None)
+
+    def stop(self, timeout=WORKER_STOP_TIMEOUT):
+        """Останавливает воркеры, дожидаясь сохранения их состояния."""
+        self._stop_shards(list(self._workers), timeout)
+        self._restart_at.clear()
+
+    def _reshard(self, shards, now):
+        """
+        Сообщает работающим воркерам новое число шардов.
+        Супервизор ждёт, пока воркеры перераспределят подписки.
+        Воркер, который не ответил за `reshard_timeout` секунд,
+        перезапускается, чтобы его подписки не опрашивались дважды.
+        """
+        waiting = []
+        for shard, control in self._controls.items():
+            if not self._workers[shard].is_alive():
+                continue
+            try:
+                control.send(shards)
+            except OSError:
+                continue
+            waiting.append(shard)
+        deadline = time.monotonic() + self.reshard_timeout
+        for shard in waiting:
+            control = self._controls[shard]
+            try:
+                if control.poll(max(deadline - time.monotonic(), 0)):
+                    control.recv()
+                    continue
+            except (EOFError, OSError):
+                pass
+            logger.error(
+                'Воркер шарда %d не перераспределил подписки, перезапуск.',
+                shard
+            )
+            self._stop_shards([shard])
+            self._spawn(shard, now)
+
+    def scale(self, processes, now=None):
+        """
+        Меняет число воркеров и перераспределяет подписки по шардам.
+        Перезапускаются только воркеры, не ответившие на запрос
+        перераспределения.
+        """
+        if processes < 1:
+            raise ValueError('Число воркеров должно быть положительным.')
+        now = time.monotonic() if now is None else now
+        previous = self.processes
+        logger.info(
+            'Перераспределение подписок: воркеров %d -> %d.',
+            previous, processes
+        )
+        if processes < previous:
+            self._stop_shards(range(processes, previous))
+        self.processes = self._wanted = processes
+        self._reshard(processes, now)
+        for shard in range(previous, processes):
+            self._spawn(shard, now)
+
+    def restart(self, now=None):
+        """Перезапускает все воркеры, чтобы они перечитали подписки."""
+        self.stop()
+        self._crashes.clear()
+        self.start(now)
+
+    def _handle_signal(self, signum, frame):
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        elif signum == signal.SIGTTIN:
+            self._wanted += 1
+        elif signum == signal.SIGTTOU:
+            self._wanted = max(self._wanted - 1, 1)
+        elif signum == signal.SIGHUP:
+            self._reload = True
+
+    def run_forever(self, interval=SUPERVISOR_CHECK_INTERVAL):
+        """Запускает воркеры и следит за ними до сигнала остановки."""
+        for signum in (
+            signal.SIGTERM, signal.SIGINT, signal.SIGTTIN, signal.SIGTTOU,
+            signal.SIGHUP
+        ):
+            signal.signal(signum, self._handle_signal)
+        self.start()
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self.processes = self._wanted
+                    self.restart()
+                elif self._wanted != self.processes:
+                    self.scale(self._wanted)
+                self.check()
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+
+def main():
+    """Запуск супервизора воркеров опроса."""
+    if load_runtime() is None:
+        return
+    Supervisor().run_forever()
+
+
+if __name__ == '__main__':
+    load_environment()
+    setup_logging(text_format=WORKER_LOG_FORMAT)
+    main()
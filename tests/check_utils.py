@@ -1,3 +1,4 @@
+import json
 import logging
 import signal
 import re
@@ -116,6 +117,43 @@ class MockTelegramBot:
         self.text = text
 
 
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class RawResponse:
+    def __init__(self, content=b'', status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw1.zip', 'status': 'approved'}
+
+
+def make_body(homeworks, current_date=100, **extra):
+    return json.dumps(
+        {'homeworks': homeworks, 'current_date': current_date, **extra},
+        ensure_ascii=False
+    ).encode()
+
+
+def too_many_requests(retry_after):
+    import telebot
+    return telebot.apihelper.ApiTelegramException(
+        'sendMessage', None,
+        {
+            'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': retry_after},
+        }
+    )
+
+
 class BreakInfiniteLoop(Exception):
     pass
 
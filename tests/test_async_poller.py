@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from tests.check_utils import RecordingBot
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def start_fake_api(handler):
+    app = web.Application()
+    app.router.add_get('/homework_statuses/', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}/homework_statuses/'
+
+
+class TestAsyncPoller:
+    def test_async_get_api_answer(self, random_timestamp):
+        import async_poller
+
+        async def handler(request):
+            assert request.headers['Authorization'].startswith('OAuth ')
+            assert request.query['from_date'] == str(random_timestamp)
+            return web.json_response(
+                {'homeworks': [], 'current_date': random_timestamp}
+            )
+
+        async def scenario():
+            runner, endpoint = await start_fake_api(handler)
+            try:
+                async with async_poller.create_session() as session:
+                    return await async_poller.async_get_api_answer(
+                        session, random_timestamp, endpoint=endpoint
+                    )
+            finally:
+                await runner.cleanup()
+
+        result = run(scenario())
+        assert result == {'homeworks': [], 'current_date': random_timestamp}
+
+    @pytest.mark.parametrize('status', [401, 500])
+    def test_async_get_api_answer_not_200(self, status):
+        import async_poller
+        from exceptions import ResponseStatusError
+
+        async def handler(request):
+            return web.json_response({}, status=status)
+
+        async def scenario():
+            runner, endpoint = await start_fake_api(handler)
+            try:
+                async with async_poller.create_session() as session:
+                    await async_poller.async_get_api_answer(
+                        session, 0, endpoint=endpoint
+                    )
+            finally:
+                await runner.cleanup()
+
+        with pytest.raises(ResponseStatusError):
+            run(scenario())
+
+    def test_fan_out_is_concurrent(self, data_with_new_hw_status):
+        import async_poller
+        import scheduler
+        import subscriptions
+        delay = 0.2
+        subscriptions_count = 50
+
+        async def handler(request):
+            await asyncio.sleep(delay)
+            return web.json_response(data_with_new_hw_status)
+
+        registry = subscriptions.SubscriptionRegistry()
+        for index in range(subscriptions_count):
+            registry.add(f'token{index}', str(index))
+        bot = RecordingBot()
+        planner = scheduler.Scheduler(bot, registry, period=10)
+
+        async def scenario():
+            runner, endpoint = await start_fake_api(handler)
+            try:
+                async with async_poller.create_session() as session:
+                    poller = async_poller.AsyncPoller(
+                        bot, planner, session,
+                        concurrency=subscriptions_count, endpoint=endpoint
+                    )
+                    started = time.monotonic()
+                    polled = await poller.run_pending(now=float('inf'))
+                    return polled, time.monotonic() - started
+            finally:
+                await runner.cleanup()
+
+        polled, elapsed = run(scenario())
+        assert polled == subscriptions_count
+        assert len(bot.sent) == subscriptions_count
+        assert elapsed < delay * subscriptions_count / 5
@@ -0,0 +1,22 @@
+class TestBenchmarkHarness:
+    def test_pipeline_smoke(self):
+        from bench.run import run_pipeline
+        result = run_pipeline(size=3, rounds=1)
+        assert result['polls'] == 3
+        assert result['deliveries'] >= 3
+        assert result['latency_p50_ms'] is not None
+        assert result['memory_per_subscription_bytes'] > 0
+
+    def test_micro_benchmarks(self):
+        from bench.run import run_micro
+        result = run_micro(number=10)
+        assert set(result) == {
+            'check_response', 'parse_status', 'deliver_message',
+            'decode_response', 'request_statuses', 'request_changed',
+            'request_unchanged',
+        }
+
+    def test_unchanged_response_is_cheaper_than_decoding(self):
+        from bench.run import run_micro
+        result = run_micro(number=30)
+        assert result['request_unchanged'] < result['request_statuses']
@@ -0,0 +1,144 @@
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+from tests.check_utils import RecordingBot
+
+
+class ThrottledResponse(check_utils.MockResponseGET):
+    def __init__(self, *args, retry_after='120', **kwargs):
+        super().__init__(
+            *args, http_status=HTTPStatus.TOO_MANY_REQUESTS, **kwargs
+        )
+        self.headers = {'Retry-After': retry_after}
+
+
+class TestCircuitBreaker:
+    def make_breaker(self, **kwargs):
+        from breaker import CircuitBreaker
+        options = dict(
+            failure_threshold=2, base_delay=10, max_delay=100, jitter=0
+        )
+        options.update(kwargs)
+        return CircuitBreaker(**options)
+
+    def test_opens_after_threshold_and_probes(self):
+        from breaker import CLOSED, HALF_OPEN, OPEN
+        from exceptions import RequestExceptionError
+        breaker = self.make_breaker()
+        error = RequestExceptionError('down')
+        breaker.record_failure(error, now=0)
+        assert breaker.state == CLOSED
+        breaker.record_failure(error, now=0)
+        assert breaker.state == OPEN
+        assert not breaker.allow(now=5)
+        assert breaker.retry_in(now=5) == 5
+        assert breaker.allow(now=10)
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow(now=10)
+        breaker.record_failure(error, now=10)
+        assert breaker.retry_in(now=10) == 20
+        assert breaker.allow(now=30)
+        assert breaker.record_success() is True
+        assert breaker.state == CLOSED
+
+    def test_unused_probe_is_granted_again(self):
+        from breaker import HALF_OPEN
+        from exceptions import RequestExceptionError
+        breaker = self.make_breaker(failure_threshold=1)
+        breaker.record_failure(RequestExceptionError('down'), now=0)
+        assert breaker.allow(now=10)
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow(now=19)
+        assert breaker.allow(now=20)
+
+    def test_retry_after_opens_immediately(self):
+        from breaker import OPEN
+        from exceptions import APIThrottledError
+        breaker = self.make_breaker()
+        breaker.record_failure(
+            APIThrottledError('slow down', 429, retry_after=42), now=0
+        )
+        assert breaker.state == OPEN
+        assert breaker.retry_in(now=0) == 42
+
+    @pytest.mark.parametrize('error, expected', [
+        ('RequestExceptionError', True),
+        ('server', True),
+        ('unauthorized', False),
+        ('HomeworkStatusError', False),
+    ])
+    def test_endpoint_failures(self, error, expected):
+        import exceptions
+        from breaker import is_endpoint_failure
+        errors = {
+            'server': exceptions.ResponseStatusError('', 500),
+            'unauthorized': exceptions.ResponseStatusError('', 401),
+        }
+        error = errors.get(error) or getattr(exceptions, error)('')
+        assert is_endpoint_failure(error) is expected
+
+
+class TestSchedulerOutage:
+    def test_outage_costs_one_probe_per_interval(self, monkeypatch):
+        import scheduler
+        import subscriptions
+        calls = []
+
+        def mock_get(*args, **kwargs):
+            calls.append(kwargs['headers']['Authorization'])
+            return check_utils.MockResponseGET(
+                http_status=HTTPStatus.INTERNAL_SERVER_ERROR, data={}
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        registry = subscriptions.SubscriptionRegistry()
+        for index in range(20):
+            registry.add(f'token{index}', str(index))
+        planner = scheduler.Scheduler(
+            RecordingBot(), registry, period=10,
+            breaker=TestCircuitBreaker().make_breaker(failure_threshold=3)
+        )
+        now = time.monotonic() + 100
+        planner.run_pending(now=now)
+        assert len(calls) == 3
+        planner.run_pending(now=now + 1)
+        assert len(calls) == 3
+        planner.run_pending(now=now + 10)
+        assert len(calls) == 4
+
+    def test_spurious_wakeup_does_not_stall_polling(self, monkeypatch):
+        import scheduler
+        import subscriptions
+        from exceptions import RequestExceptionError
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=0, data={'homeworks': [], 'current_date': 0}
+            )
+        )
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('token', '1')
+        planner = scheduler.Scheduler(
+            RecordingBot(), registry, period=10,
+            breaker=TestCircuitBreaker().make_breaker(failure_threshold=1)
+        )
+        planner.schedule('token', 50)
+        planner.breaker.record_failure(RequestExceptionError('down'), now=0)
+        assert planner.run_pending(now=20) == 0
+        assert planner.run_pending(now=60) == 1
+        assert planner.breaker.state == 'closed'
+
+    def test_retry_after_header_is_honored(self, monkeypatch):
+        import homework
+        from exceptions import APIThrottledError
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: ThrottledResponse(random_timestamp=0)
+        )
+        with pytest.raises(APIThrottledError) as error:
+            homework.get_api_answer(0)
+        assert error.value.retry_after == 120
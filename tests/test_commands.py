@@ -0,0 +1,202 @@
+import json
+from types import SimpleNamespace
+
+from tests.check_utils import RecordingBot
+
+
+def make_update(update_id, chat_id, text):
+    return SimpleNamespace(
+        update_id=update_id,
+        message=SimpleNamespace(chat=SimpleNamespace(id=chat_id), text=text),
+    )
+
+
+class UpdatesBot(RecordingBot):
+    def __init__(self, batches):
+        super().__init__()
+        self.batches = list(batches)
+        self.offsets = []
+
+    def get_updates(self, offset=None, **kwargs):
+        self.offsets.append(offset)
+        return self.batches.pop(0) if self.batches else []
+
+
+def make_listener(batches=(), path=None):
+    import commands
+    import scheduler
+    import subscriptions
+    bot = UpdatesBot(batches)
+    planner = scheduler.Scheduler(bot, subscriptions.SubscriptionRegistry())
+    return commands.CommandListener(
+        bot, planner, subscriptions_file=path
+    ), bot, planner
+
+
+def reply(name, locale=None):
+    from homework import RENDERER
+    return RENDERER.render_reply(name, locale=locale)
+
+
+class TestCommandListener:
+    def test_subscribe_adds_subscription_and_saves(self, tmp_path):
+        import subscriptions
+        path = tmp_path / 'subs.json'
+        listener, bot, planner = make_listener(
+            [[make_update(7, 42, '/subscribe@homework_bot secret')]],
+            path=str(path),
+        )
+        assert listener.poll_once() == 1
+        assert planner.registry.get('secret').chat_id == '42'
+        assert bot.sent == [('42', reply('subscribed'))]
+        assert [token for _, _, token in planner._queue] == []
+        assert [s.token for s, _ in planner.pop_due(0)] == ['secret']
+        restored = subscriptions.load_subscriptions(path=str(path))
+        assert restored.get('secret').chat_id == '42'
+
+    def test_subscribe_without_registry_file_is_refused(self, monkeypatch):
+        monkeypatch.delenv('SUBSCRIPTIONS_FILE', raising=False)
+        listener, _, planner = make_listener()
+        assert listener.handle(1, '/subscribe secret') == reply(
+            'commands_disabled'
+        )
+        assert len(planner.registry) == 0
+
+    def test_failed_save_is_reported(self, tmp_path):
+        listener, _, planner = make_listener(
+            path=str(tmp_path / 'missing' / 'subs.json')
+        )
+        assert listener.handle(1, '/subscribe secret') == reply('not_saved')
+        assert 'secret' in planner.registry
+
+    def test_offset_confirms_processed_updates(self):
+        listener, bot, _ = make_listener([
+            [make_update(3, 1, 'привет'), make_update(4, 1, '/help')],
+            [],
+        ])
+        listener.poll_once()
+        listener.poll_once()
+        assert bot.offsets == [None, 5]
+        assert len(bot.sent) == 1
+
+    def test_subscribe_requires_token(self):
+        listener, _, planner = make_listener()
+        assert listener.handle(1, '/subscribe') == reply('subscribe_usage')
+        assert len(planner.registry) == 0
+
+    def test_unsubscribe_removes_chat_subscriptions(self, tmp_path):
+        listener, _, planner = make_listener(
+            path=str(tmp_path / 'subs.json')
+        )
+        listener.handle(1, '/subscribe a')
+        listener.handle(1, '/subscribe b')
+        listener.handle(2, '/subscribe c')
+        assert listener.handle(1, '/unsubscribe') == reply('unsubscribed')
+        assert [s.token for s in planner.registry] == ['c']
+        assert planner.registry.for_chat('1') == []
+        assert [s.token for s, _ in planner.pop_due(0)] == ['c']
+        assert listener.handle(1, '/unsubscribe') == reply('not_subscribed')
+
+    def test_status_lists_homework_verdicts(self):
+        from homework import HOMEWORK_VERDICTS
+        listener, _, planner = make_listener()
+        assert listener.handle(5, '/status') == reply('not_subscribed')
+        subscription = planner.subscribe('token', '5')
+        subscription.statuses.update('1', 'reviewing')
+        subscription.statuses.update('2', 'approved')
+        text = listener.handle(5, '/status')
+        assert 'Работ отслеживается: 2, на проверке: 1.' in text
+        assert f'1: {HOMEWORK_VERDICTS["reviewing"]}' in text
+        assert f'2: {HOMEWORK_VERDICTS["approved"]}' in text
+        assert 'token' not in text
+
+    def test_status_shows_error_text_not_fingerprint(self):
+        from exceptions import ResponseStatusError
+        from state import SubscriptionState
+        listener, _, planner = make_listener()
+        subscription = planner.subscribe('token', '5')
+        subscription.errors.should_send(ResponseStatusError('Код 503'))
+        text = listener.handle(5, '/status')
+        assert text.endswith('Последний сбой: Код 503')
+        assert '#' not in text
+        restarted = planner.subscribe('other', '6')
+        restarted.restore(SubscriptionState(0, {}, 'ResponseStatusError: #'))
+        assert 'Последний сбой' not in listener.handle(6, '/status')
+
+    def test_status_skips_api_while_breaker_is_open(self, monkeypatch):
+        import requests
+        from exceptions import RequestExceptionError
+        from response_cache import ReadThroughCache
+
+        def fail(*args, **kwargs):
+            raise AssertionError('API не должен опрашиваться')
+
+        monkeypatch.setattr(requests, 'get', fail)
+        listener, _, planner = make_listener()
+        planner.cache = ReadThroughCache()
+        subscription = planner.subscribe('token', '5')
+        subscription.statuses.update('1', 'reviewing')
+        for _ in range(planner.breaker.failure_threshold):
+            planner.breaker.record_failure(RequestExceptionError('сбой'))
+        text = listener.handle(5, '/status')
+        assert 'Работ отслеживается: 1, на проверке: 1.' in text
+        assert planner.breaker.state != 'closed'
+
+    def test_replies_use_subscription_locale(self, monkeypatch):
+        import homework
+        from messages import MessageRenderer
+        renderer = MessageRenderer(
+            homework.HOMEWORK_VERDICTS,
+            {'en': {'replies': {'help': 'Commands'}}}
+        )
+        monkeypatch.setattr(homework, 'RENDERER', renderer)
+        monkeypatch.setattr('commands.RENDERER', renderer)
+        listener, bot, planner = make_listener()
+        planner.registry.add('token', '5', locale='en')
+        assert listener.handle(5, '/help') == 'Commands'
+        assert listener.handle(6, '/help') == reply('help')
+        assert [chat_id for chat_id, _ in bot.sent] == ['5', '6']
+
+    def test_unknown_command_answers_with_help(self):
+        listener, _, _ = make_listener()
+        assert listener.handle(1, '/what') == reply('help')
+        assert listener.handle(1, 'просто текст') is None
+
+
+class TestSchedulerIntake:
+    def test_rescheduling_skips_stale_entries(self):
+        import scheduler
+        import subscriptions
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('a', '1')
+        planner = scheduler.Scheduler(RecordingBot(), registry)
+        planner.schedule('a', 1)
+        planner.schedule('a', 5)
+        assert planner.pop_due(3) == []
+        assert [due for _, due in planner.pop_due(5)] == [5]
+
+    def test_resubscribe_is_not_queued_twice(self):
+        import scheduler
+        import subscriptions
+        planner = scheduler.Scheduler(
+            RecordingBot(), subscriptions.SubscriptionRegistry()
+        )
+        planner.subscribe('a', '1', locale='en')
+        planner.subscribe('a', '2')
+        assert len(planner.pop_due(0)) == 1
+        assert planner.registry.for_chat('2')[0].token == 'a'
+        assert planner.registry.get('a').locale == 'en'
+
+
+class TestSaveSubscriptions:
+    def test_round_trip_keeps_locale(self, tmp_path):
+        import subscriptions
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('a', '1', locale='en')
+        registry.add('b', '2')
+        path = tmp_path / 'subs.json'
+        subscriptions.save_subscriptions(registry, str(path))
+        assert json.loads(path.read_text())[0]['locale'] == 'en'
+        restored = subscriptions.load_subscriptions(path=str(path))
+        assert restored.get('a').locale == 'en'
+        assert restored.get('b').chat_id == '2'
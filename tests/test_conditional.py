@@ -0,0 +1,141 @@
+import json
+
+import pytest
+import requests
+
+from tests.check_utils import HOMEWORK, RawResponse, RecordingBot, make_body
+
+LARGE_HOMEWORK = dict(HOMEWORK, reviewer_comment='Замечание. ' * 200)
+
+
+def skipped(reason):
+    from metrics import SKIPPED_RESPONSES
+    return SKIPPED_RESPONSES.labels(reason).value
+
+
+@pytest.fixture
+def api(monkeypatch):
+    calls = []
+    responses = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        calls.append(dict(headers))
+        return responses.pop(0)
+
+    monkeypatch.setattr(requests, 'get', fake_get)
+    return calls, responses
+
+
+class TestResponseValidator:
+    def test_same_homeworks_are_not_decoded(self, api):
+        import scheduler
+        from subscriptions import Subscription
+        _, responses = api
+        responses.extend([
+            RawResponse(make_body([LARGE_HOMEWORK], 100)),
+            RawResponse(make_body([LARGE_HOMEWORK], 200)),
+        ])
+        bot = RecordingBot()
+        subscription = Subscription('token', '1')
+        before = skipped('same_homeworks')
+        scheduler.poll_subscription(bot, subscription)
+        scheduler.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1
+        assert skipped('same_homeworks') == before + 1
+        assert subscription.cursor == 200
+
+    def test_failed_processing_is_not_skipped(self, api):
+        import scheduler
+        from subscriptions import Subscription
+        _, responses = api
+        broken = json.dumps({
+            'current_date': 100, 'comment': LARGE_HOMEWORK['reviewer_comment']
+        }).encode()
+        responses.extend([RawResponse(broken), RawResponse(broken)])
+        bot = RecordingBot()
+        subscription = Subscription('token', '1', cursor=0)
+        first = scheduler.poll_subscription(bot, subscription)
+        second = scheduler.poll_subscription(bot, subscription)
+        assert type(first) is type(second)
+        assert subscription.cursor == 0
+
+    def test_etag_is_sent_and_304_is_skipped(self, api):
+        import scheduler
+        from subscriptions import Subscription
+        calls, responses = api
+        responses.extend([
+            RawResponse(make_body([], 100), headers={'ETag': '"v1"'}),
+            RawResponse(status_code=304),
+        ])
+        subscription = Subscription('token', '1', cursor=0)
+        before = skipped('not_modified')
+        assert scheduler.poll_subscription(
+            RecordingBot(), subscription
+        ) is None
+        assert scheduler.poll_subscription(
+            RecordingBot(), subscription
+        ) is None
+        assert 'If-None-Match' not in calls[0]
+        assert calls[1]['If-None-Match'] == '"v1"'
+        assert skipped('not_modified') == before + 1
+        assert subscription.cursor == 100
+
+    def test_304_without_validator_is_an_error(self, api):
+        import homework
+        from exceptions import ResponseStatusError
+        _, responses = api
+        responses.append(RawResponse(status_code=304))
+        with pytest.raises(ResponseStatusError):
+            homework.request_homework_statuses({}, 0)
+
+    def test_digest_ignores_current_date(self):
+        from conditional import body_digest
+        first = body_digest(make_body([HOMEWORK], 100))
+        second = body_digest(make_body([HOMEWORK], 123456))
+        changed = body_digest(make_body([dict(HOMEWORK, status='x')], 100))
+        assert first[0] == 100 and second[0] == 123456
+        assert first[1] == second[1] != changed[1]
+
+    @pytest.mark.parametrize('body', [
+        make_body([HOMEWORK], 100, comment='current_date'),
+        b'{"homeworks": [], "current_date": "100"}',
+        b'{"homeworks": []}',
+    ])
+    def test_ambiguous_body_is_not_hashed(self, body):
+        from conditional import body_digest
+        assert body_digest(body) is None
+
+    def test_small_body_is_always_decoded(self):
+        from conditional import ResponseValidator
+        validator = ResponseValidator(min_size=1024)
+        body = make_body([HOMEWORK], 100)
+        assert validator.check(200, {}, body) is None
+        validator.commit()
+        assert validator.check(200, {}, body) is None
+
+    def test_malformed_body_is_left_to_decoder(self):
+        from conditional import ResponseValidator
+        assert ResponseValidator().check(200, {}, b'{"homeworks": [') is None
+
+    @pytest.mark.parametrize('body', [
+        b'<html>Bad Gateway</html>', b'{"homeworks": [',
+    ])
+    def test_non_json_body_is_format_error(self, api, body):
+        import homework
+        from conditional import ResponseValidator
+        from exceptions import ResponseFormatError
+        _, responses = api
+        responses.append(RawResponse(body))
+        with pytest.raises(ResponseFormatError) as error:
+            homework.request_homework_statuses(
+                {}, 0, validator=ResponseValidator()
+            )
+        message = str(error.value)
+        assert message.count('Не удалось обработать ответ от сервера') <= 1
+
+    def test_disabled_validator(self):
+        from conditional import ResponseValidator
+        validator = ResponseValidator(enabled=False)
+        validator.etag = '"v1"'
+        assert validator.headers({}) == {}
+        assert validator.check(304, {}, b'') is None
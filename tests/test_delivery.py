@@ -0,0 +1,83 @@
+import threading
+import time
+
+from tests.check_utils import too_many_requests
+
+
+class SlowBot:
+    def __init__(self, failures=()):
+        self.sent = []
+        self.failures = list(failures)
+        self.delivered = threading.Event()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+        self.delivered.set()
+
+
+class TestDeliveryQueue:
+    def test_messages_for_one_chat_are_coalesced(self):
+        from delivery import DeliveryQueue
+        bot = SlowBot()
+        outbox = DeliveryQueue(bot)
+        for index in range(3):
+            outbox.send_message(chat_id='1', text=f'message {index}')
+        outbox.send_message(chat_id='2', text='other')
+        assert len(outbox) == 4
+        outbox.start()
+        outbox.stop(timeout=1)
+        assert sorted(chat for chat, _, _ in bot.sent) == ['1', '2']
+        texts = dict((chat, text) for chat, text, _ in bot.sent)
+        assert texts['1'] == 'message 0\n\nmessage 1\n\nmessage 2'
+        assert len(outbox) == 0
+
+    def test_per_chat_rate_limit(self):
+        from delivery import DeliveryQueue
+        bot = SlowBot()
+        with DeliveryQueue(bot, chat_rate=10) as outbox:
+            outbox.send_message(chat_id='1', text='first')
+            assert bot.delivered.wait(1)
+            outbox.send_message(chat_id='1', text='second')
+        first, second = bot.sent
+        assert second[2] - first[2] >= 0.09
+
+    def test_retry_after_on_429(self):
+        from delivery import DeliveryQueue
+        bot = SlowBot(failures=[too_many_requests(0.2)])
+        started = time.monotonic()
+        with DeliveryQueue(bot, chat_rate=100) as outbox:
+            outbox.send_message(chat_id='1', text='hello')
+        assert [text for _, text, _ in bot.sent] == ['hello']
+        assert bot.sent[0][2] - started >= 0.2
+
+    def test_gives_up_after_max_retries(self, caplog):
+        from delivery import DeliveryQueue
+        bot = SlowBot(failures=[RuntimeError('boom')] * 3)
+        with DeliveryQueue(
+            bot, chat_rate=100, max_retries=2, retry_delay=0.01
+        ) as outbox:
+            outbox.send_message(chat_id='1', text='hello')
+        assert bot.sent == []
+        assert bot.failures == []
+        assert any(
+            record.levelname == 'ERROR' for record in caplog.records
+        )
+
+    def test_exit_does_not_wait_for_long_retry(self, monkeypatch):
+        import delivery
+        monkeypatch.setattr(delivery, 'TELEGRAM_STOP_TIMEOUT', 0.1)
+        bot = SlowBot(failures=[too_many_requests(60)])
+        started = time.monotonic()
+        with delivery.DeliveryQueue(bot, chat_rate=100) as outbox:
+            outbox.send_message(chat_id='1', text='hello')
+        assert time.monotonic() - started < 1
+        assert bot.sent == []
+        assert len(outbox) == 1
+
+    def test_coalesce_respects_message_limit(self):
+        from delivery import coalesce
+        text, count = coalesce(['a' * 10, 'b' * 10, 'c' * 10], limit=25)
+        assert count == 2
+        assert text == 'a' * 10 + '\n\n' + 'b' * 10
@@ -0,0 +1,76 @@
+from tests.check_utils import RecordingBot
+
+
+class TestErrorFingerprint:
+    def test_numbers_are_normalized(self):
+        from error_dedup import error_fingerprint
+        from exceptions import ResponseStatusError
+        first = ResponseStatusError('Код ответа API: 500')
+        second = ResponseStatusError('Код ответа API: 502')
+        assert error_fingerprint(first) == error_fingerprint(second)
+
+    def test_class_is_part_of_fingerprint(self):
+        from error_dedup import error_fingerprint
+        from exceptions import RequestExceptionError, ResponseFormatError
+        assert error_fingerprint(
+            RequestExceptionError('Сбой')
+        ) != error_fingerprint(ResponseFormatError('Сбой'))
+
+
+class TestErrorDeduplicator:
+    def test_alternating_errors_are_sent_once(self):
+        from error_dedup import ErrorDeduplicator
+        from exceptions import RequestExceptionError, ResponseStatusError
+        errors = ErrorDeduplicator(window=60, now=0)
+        sent = [
+            errors.should_send(error, now)
+            for now, error in enumerate([
+                ResponseStatusError('Код 500'),
+                RequestExceptionError('Таймаут'),
+                ResponseStatusError('Код 503'),
+                RequestExceptionError('Таймаут'),
+            ])
+        ]
+        assert sent == [True, True, False, False]
+
+    def test_repeat_after_window_is_sent(self):
+        from error_dedup import ErrorDeduplicator
+        errors = ErrorDeduplicator(window=60, now=0)
+        assert errors.should_send(ValueError('x'), 0)
+        assert not errors.should_send(ValueError('x'), 59)
+        assert errors.should_send(ValueError('x'), 60)
+
+    def test_digest_counts_suppressed_repeats(self):
+        from error_dedup import ErrorDeduplicator
+        errors = ErrorDeduplicator(window=600, digest_interval=60, now=0)
+        for now in range(5):
+            errors.should_send(ValueError(f'Код {now}'), now)
+        assert errors.digest(30) == []
+        assert errors.digest(60) == [('Код 4', 4)]
+        assert errors.digest(120) == []
+
+    def test_restored_error_is_not_resent(self):
+        from error_dedup import ErrorDeduplicator, error_fingerprint
+        errors = ErrorDeduplicator(window=60, now=0)
+        errors.restore(error_fingerprint(ValueError('Код 1')), 0)
+        assert not errors.should_send(ValueError('Код 2'), 10)
+
+
+class TestErrorNotifications:
+    def test_report_error_and_digest(self, homework_module):
+        from error_dedup import ErrorDeduplicator
+        from exceptions import ResponseStatusError
+        from subscriptions import Subscription
+        bot = RecordingBot()
+        subscription = Subscription('token', '1')
+        subscription.errors = ErrorDeduplicator(digest_interval=0)
+        for code in (500, 502, 503):
+            homework_module.report_error(
+                bot, subscription, ResponseStatusError(f'Код {code}')
+            )
+        homework_module.send_error_digest(bot, subscription)
+        assert [text for _, text in bot.sent] == [
+            'Сбой в работе программы: Код 500',
+            'Повторов сбоя за 1 мин.: 2. Код 503',
+        ]
+        assert subscription.last_error == 'ResponseStatusError: Код #'
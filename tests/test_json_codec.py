@@ -0,0 +1,51 @@
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+from tests.check_utils import RawResponse
+
+
+class TestJsonCodec:
+    @pytest.mark.parametrize('backend', ['orjson', 'json'])
+    def test_loads_utf8_bytes(self, backend):
+        import json_codec
+        loads = json_codec.get_loads(backend)
+        data = '{"status": "approved", "comment": "Отлично"}'.encode()
+        assert loads(data) == {'status': 'approved', 'comment': 'Отлично'}
+
+    @pytest.mark.parametrize('backend', ['orjson', 'json'])
+    def test_malformed_input_raises_value_error(self, backend):
+        import json_codec
+        loads = json_codec.get_loads(backend)
+        for data in (b'{"homeworks": [', b'\xff\xfe'):
+            with pytest.raises(ValueError):
+                loads(data)
+
+    def test_fallback_without_orjson(self, monkeypatch):
+        import json_codec
+        monkeypatch.setattr(json_codec, 'orjson', None)
+        assert json_codec.get_loads('orjson') is json_codec._stdlib_loads
+
+    def test_decode_response_uses_raw_bytes(self):
+        import json_codec
+        response = RawResponse(b'{"homeworks": [], "current_date": 1}')
+        assert json_codec.decode_response(response) == {
+            'homeworks': [], 'current_date': 1
+        }
+
+    def test_decode_response_without_content(self, random_timestamp):
+        import json_codec
+        response = check_utils.MockResponseGET(
+            random_timestamp=random_timestamp
+        )
+        assert json_codec.decode_response(response) == response.data
+
+    def test_malformed_body_raises_response_format_error(self, monkeypatch):
+        import homework
+        from exceptions import ResponseFormatError
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: RawResponse(b'<html>')
+        )
+        with pytest.raises(ResponseFormatError):
+            homework.get_api_answer(0)
@@ -0,0 +1,117 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    logging.getLogger('scheduler').setLevel(logging.NOTSET)
+
+
+def make_record(msg, level=logging.DEBUG, args=(), name='scheduler'):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestParseLevels:
+    def test_module_levels(self):
+        from log_config import parse_levels
+        assert parse_levels(' scheduler=info, delivery=WARNING,') == {
+            'scheduler': logging.INFO, 'delivery': logging.WARNING,
+        }
+        assert parse_levels('') == {}
+
+    @pytest.mark.parametrize('spec', ['scheduler', 'scheduler=LOUD', '=INFO'])
+    def test_invalid_levels(self, spec):
+        from log_config import parse_levels
+        with pytest.raises(ValueError):
+            parse_levels(spec)
+
+
+class TestDebugSampler:
+    def test_repetitive_debug_records_are_sampled(self):
+        from log_config import DebugSampler
+        sampler = DebugSampler(every=100)
+        passed = [
+            sampler.filter(make_record('Статус работы не изменился.'))
+            for _ in range(250)
+        ]
+        assert passed.count(True) == 3
+        assert passed[0] and passed[100] and passed[200]
+
+    def test_templates_are_counted_separately(self):
+        from log_config import DebugSampler
+        sampler = DebugSampler(every=10)
+        assert sampler.filter(make_record('объединено: %d.', args=(1,)))
+        assert not sampler.filter(make_record('объединено: %d.', args=(2,)))
+        assert sampler.filter(make_record('Статус работы не изменился.'))
+
+    def test_higher_levels_always_pass(self):
+        from log_config import DebugSampler
+        sampler = DebugSampler(every=100)
+        assert all(
+            sampler.filter(make_record('сбой', level=logging.ERROR))
+            for _ in range(5)
+        )
+
+
+class TestSetupLogging:
+    def test_json_records_with_context(self, restore_logging):
+        from log_config import setup_logging, stop_logging
+        from tracing import TRACER
+        stream = io.StringIO()
+        listener = setup_logging(
+            level='DEBUG', levels='scheduler=INFO', log_format='json',
+            sample=1, stream=stream
+        )
+        logger = logging.getLogger('scheduler')
+        with TRACER.subscription('sub'), TRACER.span('poll'):
+            logger.info('Запущен опрос подписок: %d.', 3)
+            logger.debug('Не попадёт в журнал.')
+        logging.getLogger('delivery').debug('Отправлено.')
+        stop_logging(listener)
+
+        first, second = map(json.loads, stream.getvalue().splitlines())
+        assert first['message'] == 'Запущен опрос подписок: 3.'
+        assert first['level'] == 'INFO'
+        assert first['logger'] == 'scheduler'
+        assert first['subscription'] == 'sub'
+        assert first['stage'] == 'poll'
+        assert second['logger'] == 'delivery'
+        assert second['subscription'] is None
+
+    def test_text_format(self, restore_logging):
+        from log_config import setup_logging, stop_logging
+        stream = io.StringIO()
+        listener = setup_logging(
+            log_format='text', stream=stream, text_format='%(message)s'
+        )
+        logging.getLogger('scheduler').warning('Сбой %s', 'API')
+        stop_logging(listener)
+        stop_logging(listener)
+        assert stream.getvalue() == 'Сбой API\n'
+
+    def test_text_is_the_default_format(self, restore_logging):
+        import log_config
+        stream = io.StringIO()
+        listener = log_config.setup_logging(stream=stream)
+        logging.getLogger('scheduler').warning('Сбой')
+        log_config.stop_logging(listener)
+        assert log_config.LOG_FORMAT == 'text'
+        assert stream.getvalue().startswith('WARNING - ')
+
+    def test_records_are_queued_unformatted(self):
+        from log_config import DeferredQueueHandler
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        handler.handle(make_record('Сбой %s', logging.ERROR, args=('API',)))
+        record = log_queue.get_nowait()
+        assert (record.msg, record.args) == ('Сбой %s', ('API',))
+        assert record.getMessage() == 'Сбой API'
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+VERDICTS = {
+    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    'reviewing': 'Работа взята на проверку ревьюером.',
+    'rejected': 'Работа проверена: у ревьюера есть замечания.',
+}
+ENGLISH = {
+    'en': {
+        'status': 'Review status of "{homework_name}" changed. {verdict}',
+        'error': 'Program failure: {error}',
+        'verdicts': {'approved': 'Approved!'},
+    }
+}
+
+
+class TestMessageRenderer:
+    def test_default_messages_match_parse_status(self, homework_module):
+        from messages import MessageRenderer
+        from records import HomeworkStatus
+        renderer = MessageRenderer(homework_module.HOMEWORK_VERDICTS)
+        for status in homework_module.HOMEWORK_VERDICTS:
+            assert renderer.render_status(
+                'hw {1}', HomeworkStatus.from_api(status)
+            ) == homework_module.parse_status(
+                {'homework_name': 'hw {1}', 'status': status}
+            )
+        assert renderer.render_error('boom') == (
+            'Сбой в работе программы: boom'
+        )
+
+    def test_rendered_messages_are_cached(self):
+        from messages import MessageRenderer
+        from records import HomeworkStatus
+        renderer = MessageRenderer(VERDICTS)
+        first = renderer.render_status('hw1', HomeworkStatus.APPROVED)
+        second = renderer.render_status('hw1', HomeworkStatus.APPROVED)
+        assert first is second
+        assert renderer.render_status.cache_info().hits == 1
+
+    def test_locale_falls_back_to_default(self):
+        from messages import MessageRenderer
+        from records import HomeworkStatus
+        renderer = MessageRenderer(VERDICTS, ENGLISH)
+        assert renderer.render_status(
+            'hw1', HomeworkStatus.APPROVED, 'en'
+        ) == 'Review status of "hw1" changed. Approved!'
+        assert renderer.render_status(
+            'hw1', HomeworkStatus.REVIEWING, 'en'
+        ).endswith(VERDICTS['reviewing'])
+        assert renderer.render_error('boom', 'de') == (
+            'Сбой в работе программы: boom'
+        )
+
+    def test_templates_loaded_from_file(self, tmp_path):
+        from messages import load_renderer
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps(ENGLISH), encoding='utf-8')
+        renderer = load_renderer(VERDICTS, str(path), 'en')
+        assert renderer.render_error('boom') == 'Program failure: boom'
+
+    @pytest.mark.parametrize('templates, locale', [
+        ({'en': {'status': '{unknown}'}}, 'en'),
+        ({'en': {'error': '{error!r}'}}, 'en'),
+        ({'en': {'verdicts': {'lost': 'Lost'}}}, 'en'),
+        ({'en': {'replies': {'lost': 'Lost'}}}, 'en'),
+        ({'en': {'replies': {'status_error': '{verdict}'}}}, 'en'),
+        ({'en': []}, 'en'),
+        (None, 'en'),
+    ])
+    def test_invalid_templates(self, templates, locale):
+        from exceptions import MessageTemplateError
+        from messages import MessageRenderer
+        with pytest.raises(MessageTemplateError):
+            MessageRenderer(VERDICTS, templates, locale)
+
+    def test_subscription_locale(self, tmp_path):
+        from subscriptions import load_subscriptions
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'locale': 'en'},
+            {'token': 'b', 'chat_id': 2},
+        ]))
+        registry = load_subscriptions(str(path))
+        assert registry.get('a').locale == 'en'
+        assert registry.get('b').locale is None
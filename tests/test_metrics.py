@@ -0,0 +1,71 @@
+import urllib.request
+
+import requests
+
+import tests.check_utils as check_utils
+
+
+class TestMetricsRegistry:
+    def test_exposition_format(self):
+        from metrics import Counter, Gauge, Histogram, Registry
+        registry = Registry()
+        counter = Counter('c_total', 'c', ('error',), registry=registry)
+        counter.labels('RequestExceptionError').inc()
+        counter.labels('RequestExceptionError').inc()
+        gauge = Gauge('g', 'g', registry=registry)
+        gauge.set_function(lambda: 7)
+        histogram = Histogram('h', 'h', buckets=(1, 5), registry=registry)
+        histogram.observe(0.5)
+        histogram.observe(3)
+        text = registry.exposition()
+        assert 'c_total{error="RequestExceptionError"} 2.0' in text
+        assert 'g 7.0' in text
+        assert 'h_bucket{le="1.0"} 1' in text
+        assert 'h_bucket{le="5.0"} 2' in text
+        assert 'h_count 2' in text
+        assert '# TYPE h histogram' in text
+
+    def test_metrics_endpoint(self):
+        from metrics import Counter, Registry, start_metrics_server
+        registry = Registry()
+        Counter('served_total', 'served', registry=registry).inc()
+        server = start_metrics_server(port=0, registry=registry)
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'served_total 1.0' in body
+
+    def test_server_disabled_without_port(self, monkeypatch):
+        import metrics
+        monkeypatch.setattr(metrics, 'METRICS_PORT', None)
+        assert metrics.start_metrics_server() is None
+
+
+class TestPipelineMetrics:
+    def test_poll_and_send_are_counted(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        import metrics
+        polls = metrics.POLLS._default().value
+        requests_observed = metrics.API_REQUEST_SECONDS._default().count
+        sent = metrics.TELEGRAM_SENT._default().value
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+        )
+        homework_module.get_api_answer(random_timestamp)
+        homework_module.deliver_message(
+            check_utils.MockTelegramBot(), '1', 'text'
+        )
+        assert metrics.POLLS._default().value == polls + 1
+        assert (
+            metrics.API_REQUEST_SECONDS._default().count
+            == requests_observed + 1
+        )
+        assert metrics.TELEGRAM_SENT._default().value == sent + 1
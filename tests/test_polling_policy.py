@@ -0,0 +1,38 @@
+import pytest
+
+
+class TestPollingPolicy:
+    def make_policy(self, **kwargs):
+        from polling_policy import PollingPolicy
+        options = dict(
+            min_interval=60, max_interval=3600, idle_after=100, jitter=0
+        )
+        options.update(kwargs)
+        return PollingPolicy(600, **options)
+
+    def test_base_interval(self):
+        assert self.make_policy().next_interval(False, 0) == 600
+
+    def test_reviewing_is_polled_faster(self):
+        assert self.make_policy().next_interval(True, 0) == 60
+
+    def test_idle_backs_off_exponentially_up_to_max(self):
+        policy = self.make_policy()
+        assert policy.next_interval(False, 100) == 1200
+        assert policy.next_interval(False, 250) == 2400
+        assert policy.next_interval(False, 10 ** 9) == 3600
+
+    def test_jitter_bounds(self):
+        policy = self.make_policy(jitter=0.1)
+        intervals = [policy.next_interval(False, 0) for _ in range(200)]
+        assert all(540 <= interval <= 660 for interval in intervals)
+        assert len(set(intervals)) > 1
+
+    @pytest.mark.parametrize('statuses, expected', [
+        ({1: 'approved'}, False),
+        ({1: 'approved', 2: 'reviewing'}, True),
+    ])
+    def test_has_reviewing(self, statuses, expected):
+        from polling_policy import has_reviewing
+        from status_index import StatusIndex
+        assert has_reviewing(StatusIndex(statuses)) is expected
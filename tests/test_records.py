@@ -0,0 +1,72 @@
+import sys
+
+import pytest
+
+
+class TestHomeworkStatus:
+    def test_codes_cover_verdicts(self, homework_module):
+        from records import HomeworkStatus
+        for status in homework_module.HOMEWORK_VERDICTS:
+            code = HomeworkStatus.from_api(status)
+            assert code is not HomeworkStatus.UNKNOWN
+            assert code.api_name == status
+
+    @pytest.mark.parametrize('status', ['unknown', None, ['approved']])
+    def test_unknown_status(self, status):
+        from records import HomeworkStatus
+        assert HomeworkStatus.from_api(status) is HomeworkStatus.UNKNOWN
+
+
+class TestHomework:
+    def test_record_is_smaller_than_dict(self):
+        from records import Homework
+        homework = {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+        record = Homework.from_dict(homework)
+        assert not hasattr(record, '__dict__')
+        assert sys.getsizeof(record) < sys.getsizeof(homework)
+
+    def test_repr_without_status(self):
+        from records import Homework
+        assert repr(Homework(1, 'hw1', None)) == 'Homework(id=1, status=None)'
+        assert repr(Homework(1, 'hw1', 'approved')) == (
+            'Homework(id=1, status=APPROVED)'
+        )
+
+    def test_parse_status_matches_dict(self, homework_module):
+        from records import Homework
+        for status in homework_module.HOMEWORK_VERDICTS:
+            homework = {'homework_name': 'hw1', 'status': status}
+            assert homework_module.parse_status(
+                Homework.from_dict(homework)
+            ) == homework_module.parse_status(homework)
+
+    @pytest.mark.parametrize('homework, error', [
+        ({'status': 'approved'}, 'APIResponseKeyError'),
+        ({'homework_name': 'hw1'}, 'APIResponseKeyError'),
+        ({'homework_name': 'hw1', 'status': 'lost'}, 'HomeworkStatusError'),
+    ])
+    def test_parse_status_errors(self, homework, error, homework_module):
+        import exceptions
+        from records import Homework
+        with pytest.raises(getattr(exceptions, error)):
+            homework_module.parse_status(Homework.from_dict(homework))
+
+
+class TestCompactState:
+    def test_status_index_stores_codes(self):
+        from records import HomeworkStatus
+        from status_index import StatusIndex
+        index = StatusIndex({1: 'approved', 2: 'custom'})
+        assert index._statuses[1] is HomeworkStatus.APPROVED
+        assert index.get(1) == 'approved'
+        assert dict(index.items()) == {1: 'approved', 2: 'custom'}
+        assert index.changes(
+            [{'id': 1, 'status': 'approved'}, {'id': 2, 'status': 'custom'}]
+        ) == []
+
+    def test_subscription_has_slots(self):
+        from subscriptions import Subscription
+        subscription = Subscription('token', '1')
+        assert not hasattr(subscription, '__dict__')
+        with pytest.raises(AttributeError):
+            subscription.extra = 1
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from tests.check_utils import HOMEWORK, RawResponse, RecordingBot, make_body
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    from response_cache import ReadThroughCache
+    clock = FakeClock()
+    return ReadThroughCache(clock=clock, **kwargs), clock
+
+
+class TestReadThroughCache:
+    def test_fresh_value_is_reused_until_ttl(self):
+        cache, clock = make_cache(ttl=10, maxsize=4)
+        loads = []
+
+        def load():
+            loads.append(clock.now)
+            return len(loads)
+
+        assert cache.get('a', load) == 1
+        clock.now = 9
+        assert cache.get('a', load) == 1
+        clock.now = 10
+        assert cache.get('a', load) == 2
+        assert loads == [0, 10]
+
+    def test_least_recently_used_is_evicted(self):
+        cache, _ = make_cache(ttl=10, maxsize=2)
+        cache.get('a', lambda: 'a')
+        cache.get('b', lambda: 'b')
+        cache.get('a', lambda: 'stale')
+        cache.get('c', lambda: 'c')
+        assert len(cache) == 2
+        assert cache.get('a', lambda: 'new') == 'a'
+        assert cache.get('b', lambda: 'new') == 'new'
+
+    def test_errors_are_shared_but_not_cached(self):
+        cache, _ = make_cache(ttl=10, maxsize=2)
+
+        def fail():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            cache.get('a', fail)
+        assert cache.get('a', lambda: 'ok') == 'ok'
+
+    def test_concurrent_lookups_share_one_load(self):
+        cache, _ = make_cache(ttl=10, maxsize=2)
+        started = threading.Event()
+        release = threading.Event()
+        loads = []
+        results = []
+
+        def load():
+            loads.append(1)
+            started.set()
+            release.wait(1)
+            return 'value'
+
+        def lookup():
+            results.append(cache.get('a', load))
+
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(1)
+        assert loads == [1]
+        assert results == ['value'] * 4
+
+    def test_interrupted_load_is_not_cached(self):
+        cache, _ = make_cache(ttl=10, maxsize=2)
+        started = threading.Event()
+        results = []
+
+        def interrupted():
+            started.set()
+            time.sleep(0.05)
+            raise SystemExit(0)
+
+        def leader():
+            try:
+                cache.get('a', interrupted)
+            except SystemExit:
+                results.append('exit')
+
+        def follower():
+            results.append(cache.get('a', lambda: 'value'))
+
+        threads = [threading.Thread(target=leader)]
+        threads[0].start()
+        started.wait(1)
+        threads.append(threading.Thread(target=follower))
+        threads[1].start()
+        for thread in threads:
+            thread.join(1)
+        assert sorted(results) == ['exit', 'value']
+        assert cache.get('a', lambda: 'new') == 'value'
+
+    def test_zero_ttl_disables_cache(self):
+        cache, _ = make_cache(ttl=0, maxsize=2)
+        loads = []
+        cache.get('a', lambda: loads.append(1))
+        cache.get('a', lambda: loads.append(1))
+        assert loads == [1, 1]
+        assert len(cache) == 0
+
+
+class TestCachedPolling:
+    def test_status_query_and_poll_share_one_request(self, monkeypatch):
+        import commands
+        import scheduler
+        import subscriptions
+        calls = []
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            calls.append(params)
+            return RawResponse(make_body([HOMEWORK], 100))
+
+        monkeypatch.setattr(requests, 'get', fake_get)
+        bot = RecordingBot()
+        cache, _ = make_cache(ttl=60, maxsize=8)
+        planner = scheduler.Scheduler(
+            bot, subscriptions.SubscriptionRegistry(), cache=cache
+        )
+        listener = commands.CommandListener(bot, planner)
+        subscription = planner.subscribe('token', '1')
+        reply = listener.handle(1, '/status')
+        assert 'Работ отслеживается: 1, на проверке: 0.' in reply
+        assert len(subscription.statuses) == 0
+        assert scheduler.poll_subscription(
+            bot, subscription, cache=cache
+        ) is None
+        assert len(calls) == 1
+        assert subscription.cursor == 100
+        assert subscription.statuses.get(1) == 'approved'
+
+    def test_new_cursor_is_not_served_a_stale_response(self, monkeypatch):
+        import scheduler
+        import subscriptions
+        calls = []
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            calls.append(params['from_date'])
+            return RawResponse(make_body([], 100 + len(calls)))
+
+        monkeypatch.setattr(requests, 'get', fake_get)
+        cache, _ = make_cache(ttl=60, maxsize=8)
+        subscription = subscriptions.Subscription('token', '1', cursor=0)
+        for _ in range(2):
+            scheduler.poll_subscription(
+                RecordingBot(), subscription, cache=cache
+            )
+        assert calls == [0, 101]
+        assert subscription.cursor == 102
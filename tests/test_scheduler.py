@@ -0,0 +1,154 @@
+import json
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+from tests.check_utils import RecordingBot
+
+
+class TestSubscriptions:
+    def test_load_from_file(self, tmp_path):
+        import subscriptions
+        path = tmp_path / 'subs.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1},
+            {'token': 'b', 'chat_id': 2},
+        ]))
+        registry = subscriptions.load_subscriptions(path=str(path))
+        assert len(registry) == 2
+        assert registry.get('b').chat_id == '2'
+
+    def test_load_broken_file(self, tmp_path):
+        import subscriptions
+        from exceptions import SubscriptionConfigError
+        path = tmp_path / 'subs.json'
+        path.write_text('[{"token": "a"}]')
+        with pytest.raises(SubscriptionConfigError):
+            subscriptions.load_subscriptions(path=str(path))
+
+    def test_registry_add_remove(self):
+        import subscriptions
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('a', '1')
+        registry.add('a', '2')
+        assert len(registry) == 1
+        assert registry.get('a').chat_id == '2'
+        assert registry.remove('a') is not None
+        assert 'a' not in registry
+
+
+class TestScheduler:
+    def test_polls_each_subscription_once(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import scheduler
+        import subscriptions
+        seen_tokens = []
+
+        def mock_get(*args, **kwargs):
+            seen_tokens.append(kwargs['headers']['Authorization'])
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        registry = subscriptions.SubscriptionRegistry()
+        for index in range(50):
+            registry.add(f'token{index}', str(index))
+        bot = RecordingBot()
+        planner = scheduler.Scheduler(bot, registry, period=10)
+        polled = planner.run_pending(now=float('inf'))
+        assert polled == 50
+        assert len(set(seen_tokens)) == 50
+        assert sorted(chat for chat, _ in bot.sent) == sorted(
+            str(index) for index in range(50)
+        )
+
+    def test_repeated_status_not_resent(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import scheduler
+        import subscriptions
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+        )
+        bot = RecordingBot()
+        subscription = subscriptions.Subscription('token', '1')
+        scheduler.poll_subscription(bot, subscription)
+        scheduler.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1
+
+    def test_cursor_advances_to_current_date(
+            self, monkeypatch, random_timestamp
+    ):
+        import scheduler
+        import subscriptions
+        requested_dates = []
+
+        def mock_get(*args, **kwargs):
+            requested_dates.append(kwargs['params']['from_date'])
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp + len(requested_dates)
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        bot = RecordingBot()
+        subscription = subscriptions.Subscription('token', '1', cursor=0)
+        scheduler.poll_subscription(bot, subscription)
+        scheduler.poll_subscription(bot, subscription)
+        assert requested_dates == [0, random_timestamp + 1]
+        assert subscription.cursor == random_timestamp + 2
+        assert bot.sent == []
+
+    @pytest.mark.timeout(10)
+    def test_calls_run_in_polling_thread_until_stop(self):
+        import threading
+        import scheduler
+        import subscriptions
+        planner = scheduler.Scheduler(
+            RecordingBot(), subscriptions.SubscriptionRegistry()
+        )
+        threads = []
+        loop = threading.Thread(target=planner.run_forever)
+        loop.start()
+        done = planner.call_soon(
+            lambda: threads.append(threading.current_thread())
+        )
+        assert done.wait(5)
+        assert threads == [loop]
+        planner.stop()
+        loop.join(5)
+        assert not loop.is_alive()
+
+    def test_broken_homework_does_not_stall_subscription(self, monkeypatch):
+        import scheduler
+        import subscriptions
+        data = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'lost'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                {'id': 3, 'status': 'approved'},
+            ],
+            'current_date': 100,
+        }
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(data=data)
+        )
+        bot = RecordingBot()
+        subscription = subscriptions.Subscription('token', '1', cursor=0)
+        assert scheduler.poll_subscription(bot, subscription) is None
+        assert subscription.cursor == 100
+        assert subscription.statuses.get(2) == 'approved'
+        assert 1 not in subscription.statuses
+        texts = [text for _, text in bot.sent]
+        assert len(texts) == 3
+        assert any('"hw2"' in text for text in texts)
+        scheduler.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 3
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+IMPORTTIME_OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   records
+import time:      3254 |      52421 | homework
+'''
+
+# В CI интерпретатор запускается медленнее, поэтому цель берётся с запасом.
+CI_TARGET_FACTOR = float(os.getenv('FIRST_POLL_CI_FACTOR', 3))
+
+
+class TestStartupBenchmark:
+    def test_parse_importtime(self):
+        from bench.startup import parse_importtime
+        assert parse_importtime(IMPORTTIME_OUTPUT) == {
+            'records': 0.12, 'homework': 52.421,
+        }
+
+    @pytest.mark.parametrize('module', ['homework', 'supervisor'])
+    def test_heavy_dependencies_are_imported_lazily(self, module):
+        from bench.startup import import_profile
+        profile = import_profile(module)
+        assert profile['heavy_modules'] == []
+        assert profile['import_ms'] > 0
+
+    @pytest.mark.timeout(10)
+    def test_time_to_first_poll_meets_target(self):
+        from bench.run import start_fake_servers
+        from bench.startup import FIRST_POLL_TARGET_MS, time_to_first_poll
+        process, practicum_url, _ = start_fake_servers(change_every=2)
+        try:
+            elapsed = time_to_first_poll(
+                f'{practicum_url}/api/user_api/homework_statuses/'
+            )
+        finally:
+            process.terminate()
+        assert 0 < elapsed <= FIRST_POLL_TARGET_MS * CI_TARGET_FACTOR
+
+    def test_environment_is_loaded_by_entry_point(self, monkeypatch):
+        import homework
+        for name in (
+            'PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID', 'HEADERS'
+        ):
+            monkeypatch.setattr(homework, name, None)
+        monkeypatch.setenv('PRACTICUM_TOKEN', 'fresh')
+        homework.load_environment()
+        assert homework.PRACTICUM_TOKEN == 'fresh'
+        assert homework.HEADERS == {'Authorization': 'OAuth fresh'}
+        assert homework.TELEGRAM_TOKEN is not None
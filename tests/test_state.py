@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+
+def count_rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(
+            'SELECT COUNT(*) FROM subscription_state'
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+
+class TestStateStores:
+    @pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+    def test_round_trip(self, backend, tmp_path):
+        from state import SubscriptionState, open_state_store
+        store = open_state_store(backend, str(tmp_path / 'state.sqlite3'))
+        state = SubscriptionState(100, {1: 'approved', 'hw': 'rejected'}, 'e')
+        store.save('key', state)
+        assert store.load('key') == state
+        assert store.load('missing') is None
+        store.close()
+
+    def test_base_store_is_abstract(self):
+        from state import StateStore
+        with pytest.raises(TypeError):
+            StateStore()
+
+    def test_sqlite_survives_restart(self, tmp_path):
+        from state import SqliteStateStore, SubscriptionState
+        path = str(tmp_path / 'state.sqlite3')
+        with SqliteStateStore(path) as store:
+            store.save(
+                'key', SubscriptionState(5, {7: 'reviewing'}, None, 1.5)
+            )
+        with SqliteStateStore(path) as store:
+            assert store.load('key') == SubscriptionState(
+                5, {7: 'reviewing'}, None, 1.5
+            )
+
+    def test_sqlite_adds_missing_column(self, tmp_path):
+        from state import SqliteStateStore, SubscriptionState
+        path = str(tmp_path / 'state.sqlite3')
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(
+                'CREATE TABLE subscription_state (key TEXT PRIMARY KEY, '
+                'cursor INTEGER, statuses TEXT, last_error TEXT)'
+            )
+            connection.execute(
+                'INSERT INTO subscription_state VALUES (?, ?, ?, ?)',
+                ('key', 5, '[]', None)
+            )
+        connection.close()
+        with SqliteStateStore(path) as store:
+            assert store.load('key') == SubscriptionState(5, {}, None)
+
+    def test_sqlite_write_behind(self, tmp_path):
+        from state import SqliteStateStore, SubscriptionState
+        path = str(tmp_path / 'state.sqlite3')
+        store = SqliteStateStore(path, flush_interval=3600, batch_size=3)
+        for index in range(2):
+            store.save(f'key{index}', SubscriptionState(index, {}, None))
+        assert count_rows(path) == 0
+        store.save('key2', SubscriptionState(2, {}, None))
+        assert count_rows(path) == 3
+        store.close()
+
+
+class TestSchedulerRestore:
+    def test_state_restored_on_start(self):
+        import scheduler
+        import subscriptions
+        from state import MemoryStateStore, SubscriptionState
+        store = MemoryStateStore()
+        registry = subscriptions.SubscriptionRegistry()
+        subscription = registry.add('token', '1')
+        store.save(
+            subscription.id, SubscriptionState(42, {1: 'approved'}, 'error')
+        )
+        scheduler.Scheduler(None, registry, store=store)
+        assert subscription.cursor == 42
+        assert subscription.statuses.get(1) == 'approved'
+        assert subscription.last_error == 'error'
+
+    def test_last_change_survives_restart(self):
+        import subscriptions
+        from state import MemoryStateStore
+        store = MemoryStateStore()
+        subscription = subscriptions.Subscription('token', '1')
+        subscription.last_change_at = 1000.0
+        store.save(subscription.id, subscription.snapshot())
+        restored = subscriptions.Subscription('token', '1')
+        restored.restore(store.load(subscription.id))
+        assert restored.last_change_at == 1000.0
@@ -0,0 +1,71 @@
+class TestStatusIndex:
+    def test_every_changed_homework_is_reported(self):
+        from status_index import StatusIndex
+        index = StatusIndex()
+        homeworks = [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+        ]
+        changes = index.changes(homeworks)
+        assert [key for key, _, _ in changes] == [1, 2]
+
+    def test_update_suppresses_repeated_status(self):
+        from status_index import StatusIndex
+        index = StatusIndex()
+        homework = {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'}
+        for key, status, _ in index.changes([homework]):
+            index.update(key, status)
+        assert index.changes([homework]) == []
+        approved = dict(homework, status='approved')
+        assert index.changes([approved]) == [(1, 'approved', approved)]
+
+    def test_key_falls_back_to_homework_name(self):
+        from status_index import homework_key
+        assert homework_key({'homework_name': 'hw1'}) == 'hw1'
+        assert homework_key({'id': 7, 'homework_name': 'hw1'}) == 7
+
+
+class TestMainStatuses:
+    def test_notify_new_statuses_sends_each_change(self, homework_module):
+        from status_index import StatusIndex
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id=None, text=None):
+                sent.append(text)
+
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            ],
+            'current_date': 1,
+        }
+        index = StatusIndex()
+        homework_module.notify_new_statuses(Bot(), response, index)
+        homework_module.notify_new_statuses(Bot(), response, index)
+        assert len(sent) == 2
+        assert '"hw1"' in sent[0] and '"hw2"' in sent[1]
+
+    def test_notify_new_statuses_skips_broken_homework(self, homework_module):
+        from status_index import StatusIndex
+        from subscriptions import Subscription
+        from tests.check_utils import RecordingBot
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'lost'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            ],
+            'current_date': 1,
+        }
+        bot = RecordingBot()
+        subscription = Subscription('token', '1')
+        index = StatusIndex()
+        assert homework_module.notify_new_statuses(
+            bot, response, index, subscription
+        ) == 1
+        assert homework_module.notify_new_statuses(
+            bot, response, index, subscription
+        ) == 0
+        assert index.get(2) == 'approved' and 1 not in index
+        assert len(bot.sent) == 2
@@ -0,0 +1,179 @@
+import time
+
+import pytest
+
+
+def sleeping_worker(shard, shards, control=None):
+    time.sleep(30)
+
+
+def crashing_worker(shard, shards, control=None):
+    raise SystemExit(1)
+
+
+def acking_worker(shard, shards, control=None):
+    while True:
+        try:
+            control.send(control.recv())
+        except EOFError:
+            return
+
+
+@pytest.fixture
+def supervisor_factory():
+    from supervisor import Supervisor
+    created = []
+
+    def factory(*args, **kwargs):
+        supervisor = Supervisor(*args, **kwargs)
+        created.append(supervisor)
+        return supervisor
+
+    yield factory
+    for supervisor in created:
+        supervisor.stop(timeout=1)
+
+
+class TestHashRing:
+    def test_every_key_has_a_shard(self):
+        from supervisor import HashRing
+        ring = HashRing(4)
+        shards = {ring.shard_for(f'key-{number}') for number in range(1000)}
+        assert shards == {0, 1, 2, 3}
+
+    def test_scale_up_moves_few_keys(self):
+        from supervisor import HashRing
+        keys = [f'key-{number}' for number in range(2000)]
+        before, after = HashRing(4), HashRing(5)
+        moved = sum(
+            before.shard_for(key) != after.shard_for(key) for key in keys
+        )
+        assert moved < len(keys) * 0.35
+        assert all(
+            after.shard_for(key) == 4
+            for key in keys if before.shard_for(key) != after.shard_for(key)
+        )
+
+    def test_shards_partition_registry(self):
+        from subscriptions import SubscriptionRegistry
+        from supervisor import HashRing, shard_registry
+        registry = SubscriptionRegistry()
+        for number in range(50):
+            registry.add(f'token-{number}', str(number), locale='en')
+        ring = HashRing(3)
+        shards = [shard_registry(registry, ring, shard) for shard in range(3)]
+        tokens = [
+            subscription.token for shard in shards for subscription in shard
+        ]
+        assert sorted(tokens) == sorted(s.token for s in registry)
+        assert all(s.locale == 'en' for shard in shards for s in shard)
+
+
+class TestReshard:
+    def make_worker(self, registry, shard, shards):
+        import scheduler
+        from state import MemoryStateStore
+        from supervisor import HashRing, shard_registry
+        store = MemoryStateStore()
+        planner = scheduler.Scheduler(
+            None, shard_registry(registry, HashRing(shards), shard),
+            store=store
+        )
+        return planner, store
+
+    def make_registry(self, size=60):
+        from subscriptions import SubscriptionRegistry
+        registry = SubscriptionRegistry()
+        for number in range(size):
+            registry.add(f'token-{number}', str(number), cursor=0)
+        return registry
+
+    def test_scale_up_hands_over_moved_subscriptions(self):
+        from supervisor import HashRing, reshard, shard_registry
+        registry = self.make_registry()
+        planner, store = self.make_worker(registry, 0, 2)
+        kept = {s.token for s in shard_registry(registry, HashRing(3), 0)}
+        for subscription in planner.registry:
+            subscription.cursor = 500
+        moved = reshard(planner, registry, 0, 3)
+        assert {s.token for s in planner.registry} == kept
+        assert moved == len(
+            shard_registry(registry, HashRing(2), 0)
+        ) - len(kept)
+        handed_over = [
+            s for s in shard_registry(registry, HashRing(2), 0)
+            if s.token not in kept
+        ]
+        assert handed_over
+        assert all(store.load(s.id).cursor == 500 for s in handed_over)
+
+    def test_scale_down_adopts_subscriptions_with_state(self):
+        from state import SubscriptionState
+        from supervisor import HashRing, reshard, shard_registry
+        registry = self.make_registry()
+        planner, store = self.make_worker(registry, 0, 2)
+        adopted = next(iter(shard_registry(registry, HashRing(2), 1)))
+        store.save(adopted.id, SubscriptionState(700, {}, None))
+        reshard(planner, registry, 0, 1)
+        planner.pop_due(float('inf'))
+        assert len(planner.registry) == len(registry)
+        assert planner.registry.get(adopted.token).cursor == 700
+
+
+class TestSupervisor:
+    def test_crashed_worker_is_restarted_with_backoff(
+            self, supervisor_factory
+    ):
+        supervisor = supervisor_factory(
+            1, target=crashing_worker, restart_delay=10, stable_after=100
+        )
+        supervisor.start(now=0)
+        supervisor.workers[0].join(1)
+        assert supervisor.check(now=1) == 0
+        assert supervisor.check(now=11) == 1
+        supervisor.workers[0].join(1)
+        assert supervisor.check(now=12) == 0
+        assert supervisor.check(now=31) == 0
+        assert supervisor.check(now=32) == 1
+
+    @pytest.mark.timeout(10)
+    def test_scale_keeps_running_workers(self, supervisor_factory):
+        supervisor = supervisor_factory(2, target=acking_worker)
+        supervisor.start()
+        old_workers = supervisor.workers
+        supervisor.scale(3)
+        assert sorted(supervisor.workers) == [0, 1, 2]
+        assert all(
+            supervisor.workers[shard] is old_workers[shard]
+            for shard in (0, 1)
+        )
+        assert all(
+            process.is_alive() for process in supervisor.workers.values()
+        )
+        new_worker = supervisor.workers[2]
+        supervisor.scale(1)
+        assert supervisor.workers == {0: old_workers[0]}
+        assert not new_worker.is_alive() and not old_workers[1].is_alive()
+        supervisor.stop(timeout=1)
+        assert supervisor.workers == {}
+
+    @pytest.mark.timeout(10)
+    def test_unresponsive_worker_is_restarted(self, supervisor_factory):
+        supervisor = supervisor_factory(
+            1, target=sleeping_worker, reshard_timeout=0.1
+        )
+        supervisor.start()
+        old_worker = supervisor.workers[0]
+        supervisor.scale(2)
+        assert not old_worker.is_alive()
+        assert supervisor.workers[0] is not old_worker
+        assert sorted(supervisor.workers) == [0, 1]
+
+    def test_workers_are_spawned_by_default(self):
+        from supervisor import Supervisor
+        assert Supervisor(1).context.get_start_method() == 'spawn'
+
+    def test_invalid_process_count(self):
+        from supervisor import Supervisor
+        with pytest.raises(ValueError):
+            Supervisor(0)
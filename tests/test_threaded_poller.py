@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+import requests
+
+import tests.check_utils as check_utils
+from tests.check_utils import RecordingBot, too_many_requests
+
+
+class TestThreadedPoller:
+    def test_polls_run_in_parallel(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import scheduler
+        import subscriptions
+        import threaded_poller
+        delay = 0.2
+        subscriptions_count = 20
+
+        def slow_get(*args, **kwargs):
+            time.sleep(delay)
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+
+        monkeypatch.setattr(requests, 'get', slow_get)
+        registry = subscriptions.SubscriptionRegistry()
+        for number in range(subscriptions_count):
+            registry.add(f'token-{number}', str(number))
+        bot = RecordingBot()
+        poller = threaded_poller.ThreadedPoller(
+            bot, scheduler.Scheduler(bot, registry),
+            workers=subscriptions_count
+        )
+        with poller:
+            started = time.monotonic()
+            polled = poller.run_pending(now=float('inf'))
+            elapsed = time.monotonic() - started
+        assert polled == subscriptions_count
+        assert elapsed < delay * subscriptions_count / 4
+        assert {chat_id for chat_id, _ in bot.sent} == {
+            str(number) for number in range(subscriptions_count)
+        }
+        for subscription in registry:
+            assert subscription.cursor == random_timestamp
+
+
+class TestSendPool:
+    def test_chat_order_is_preserved(self):
+        from delivery import SendPool
+        bot = RecordingBot()
+        pool = SendPool(bot, workers=3, global_rate=1000, chat_rate=1000)
+        with pool:
+            for number in range(20):
+                pool.send_message(chat_id=number % 4, text=str(number))
+        for chat_id in range(4):
+            texts = '\n\n'.join(
+                text for chat, text in bot.sent if chat == chat_id
+            )
+            assert texts.split('\n\n') == [
+                str(number) for number in range(chat_id, 20, 4)
+            ]
+
+    def test_chats_are_sent_in_parallel(self):
+        from delivery import SendPool
+        barrier = threading.Barrier(2, timeout=1)
+
+        class WaitingBot(RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                barrier.wait()
+                super().send_message(chat_id, text)
+
+        bot = WaitingBot()
+        with SendPool(bot, workers=2, global_rate=1000, max_retries=0) as pool:
+            pool.put('1', 'text')
+            pool.put('2', 'text')
+        assert sorted(chat_id for chat_id, _ in bot.sent) == ['1', '2']
+
+    def test_retry_after_on_429(self):
+        from delivery import SendPool
+
+        class ThrottledBot(RecordingBot):
+            failures = [too_many_requests(0.1)]
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if self.failures:
+                    raise self.failures.pop(0)
+                super().send_message(chat_id, text)
+
+        bot = ThrottledBot()
+        with SendPool(bot, workers=2, chat_rate=1000) as pool:
+            pool.put('1', 'text')
+        assert bot.sent == [('1', 'text')]
+
+    def test_failed_send_is_logged(self, caplog):
+        from delivery import SendPool
+
+        class FailingBot:
+            def send_message(self, **kwargs):
+                raise RuntimeError('Telegram недоступен')
+
+        with caplog.at_level(logging.ERROR):
+            with SendPool(FailingBot(), workers=1, max_retries=0) as pool:
+                pool.put('1', 'text')
+        assert len(pool) == 0
+        assert 'Telegram недоступен' in caplog.text
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+
+
+@pytest.fixture
+def ring_buffer(monkeypatch):
+    from tracing import TRACER, RingBufferExporter
+    exporter = RingBufferExporter()
+    monkeypatch.setattr(TRACER, 'exporter', exporter)
+    return exporter
+
+
+class TestTracing:
+    def test_disabled_tracer_only_tracks_context(self):
+        from tracing import Tracer, current_stage, current_subscription
+        tracer = Tracer()
+        with tracer.subscription('id'), tracer.span('http'):
+            assert current_subscription() == 'id'
+            assert current_stage() == 'http'
+        assert current_subscription() is None
+        assert current_stage() is None
+
+    def test_span_records_outcome(self, ring_buffer):
+        from tracing import TRACER
+        with TRACER.subscription('sub'):
+            with TRACER.span('ok'):
+                pass
+            with pytest.raises(ValueError):
+                with TRACER.span('failed'):
+                    raise ValueError
+        ok, failed = ring_buffer.spans
+        assert ok['name'] == 'ok' and ok['outcome'] == 'ok'
+        assert failed['outcome'] == 'error'
+        assert failed['error'] == 'ValueError'
+        assert ok['subscription'] == failed['subscription'] == 'sub'
+        assert ok['duration'] >= 0
+
+    def test_poll_pipeline_stages(
+            self, ring_buffer, monkeypatch, data_with_new_hw_status,
+            random_timestamp
+    ):
+        import scheduler
+        import subscriptions
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+        )
+        subscription = subscriptions.Subscription('token', '1')
+        scheduler.poll_subscription(
+            check_utils.MockTelegramBot(), subscription
+        )
+        names = [span['name'] for span in ring_buffer.spans]
+        assert names == [
+            'http', 'validate', 'decode', 'check_response', 'parse_status',
+            'send', 'poll',
+        ]
+        assert {span['subscription'] for span in ring_buffer.spans} == {
+            subscription.id
+        }
+
+    def test_json_lines_exporter(self, tmp_path):
+        from tracing import JsonLinesExporter, Tracer
+        path = tmp_path / 'traces.jsonl'
+        exporter = JsonLinesExporter(str(path))
+        tracer = Tracer(exporter)
+        with tracer.span('http'):
+            pass
+        exporter.close()
+        span = json.loads(path.read_text().splitlines()[0])
+        assert span['name'] == 'http'
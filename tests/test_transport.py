@@ -0,0 +1,53 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHTTPTransport:
+    def test_connection_is_reused(self, local_server):
+        from transport import HTTPTransport
+        with HTTPTransport() as transport:
+            for _ in range(5):
+                assert transport.get(local_server).status_code == 200
+            assert transport.stats() == {
+                'requests': 5, 'connections': 1, 'reused': 4
+            }
+
+    def test_default_timeout(self, monkeypatch):
+        from transport import HTTPTransport
+        transport = HTTPTransport(timeout=(1, 2))
+        captured = {}
+
+        def fake_get(url, **kwargs):
+            captured.update(kwargs)
+
+        monkeypatch.setattr(transport.session, 'get', fake_get)
+        transport.get('http://127.0.0.1/')
+        assert captured['timeout'] == (1, 2)
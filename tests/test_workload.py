@@ -0,0 +1,145 @@
+import json
+import random
+
+import pytest
+
+
+def make_workload(**config):
+    from bench.workload import Workload
+    config.setdefault('seed', 1)
+    return Workload(config, clock=lambda: 1000)
+
+
+def decode(response):
+    status, headers, body, _ = response
+    return status, headers, json.loads(body)
+
+
+class TestWorkload:
+    def test_synthetic_students_start_in_review(self):
+        workload = make_workload(homeworks=3, transition_rate=0)
+        status, _, body = decode(workload.respond('a'))
+        assert status == 200
+        assert body['current_date'] == 1000
+        assert [hw['status'] for hw in body['homeworks']] == ['reviewing'] * 3
+        assert {hw['homework_name'] for hw in body['homeworks']} == {
+            'hw-a-0', 'hw-a-1', 'hw-a-2',
+        }
+        assert set(workload.changed_at) == {'hw-a-0', 'hw-a-1', 'hw-a-2'}
+
+    def test_from_date_filters_old_homeworks(self):
+        workload = make_workload(homeworks=2, transition_rate=0)
+        workload.respond('a')
+        _, _, body = decode(workload.respond('a', from_date=1001))
+        assert body['homeworks'] == []
+
+    def test_transitions_end_in_approval(self):
+        workload = make_workload(
+            homeworks=1, transition_rate=1, approve_ratio=1
+        )
+        _, _, body = decode(workload.respond('a'))
+        assert body['homeworks'][0]['status'] == 'approved'
+        _, _, body = decode(workload.respond('a'))
+        assert body['homeworks'][0]['status'] == 'approved'
+
+    def test_replay_comes_before_synthetic_responses(self):
+        workload = make_workload(replay={
+            '*': [{'status': 503, 'raw': 'down', 'delay_ms': 5}],
+            'b': [],
+        })
+        assert workload.respond('a') == (503, {}, b'down', 0.005)
+        assert workload.respond('a')[0] == 200
+        assert workload.respond('b')[0] == 200
+
+    def test_replay_file(self, tmp_path):
+        path = tmp_path / 'recorded.jsonl'
+        path.write_text(
+            '{"status": 429, "headers": {"Retry-After": "3"}}\n\n'
+        )
+        workload = make_workload(replay_file=str(path))
+        status, headers, _, _ = workload.respond('a')
+        assert (status, headers) == (429, {'Retry-After': '3'})
+
+    @pytest.mark.parametrize('fault, status', [
+        ('429', 429), ('500', 500), ('503', 503),
+        ('malformed', 200), ('missing_keys', 200),
+    ])
+    def test_injected_faults(self, fault, status):
+        workload = make_workload(faults={fault: 1}, retry_after=4)
+        code, headers, body, _ = workload.respond('a')
+        assert code == status
+        assert workload.injected[fault] == 1
+        if fault == '429':
+            assert headers == {'Retry-After': '4'}
+        if fault == 'malformed':
+            with pytest.raises(ValueError):
+                json.loads(body)
+        if fault == 'missing_keys':
+            assert 'homeworks' not in json.loads(body)
+
+    def test_fault_phases(self):
+        workload = make_workload(faults=[
+            {'after': 3600, 'rates': {'500': 1}},
+        ])
+        assert workload.respond('a')[0] == 200
+
+    @pytest.mark.parametrize('config', [
+        {'faults': {'418': 0.1}},
+        {'faults': {'500': 0.6, '503': 0.6}},
+        {'transition_rate': 2},
+        {'latency': {'distribution': 'pareto'}},
+    ])
+    def test_invalid_config(self, config):
+        with pytest.raises(ValueError):
+            make_workload(**config)
+
+    @pytest.mark.parametrize('name', ['steady', 'incident'])
+    def test_bundled_scenarios(self, name):
+        from bench.workload import Workload, load_workload
+        workload = Workload(load_workload(f'bench/scenarios/{name}.json'))
+        assert workload.students > 0
+
+
+class TestLatency:
+    @pytest.mark.parametrize('config, low, high', [
+        ({'distribution': 'constant', 'ms': 20}, 0.02, 0.02),
+        ({'distribution': 'uniform', 'min_ms': 10, 'max_ms': 20}, 0.01, 0.02),
+        ({'distribution': 'exponential', 'mean_ms': 10}, 0, 1),
+        ({'distribution': 'lognormal', 'median_ms': 10, 'sigma': 0.1},
+         0.005, 0.02),
+    ])
+    def test_distributions(self, config, low, high):
+        from bench.workload import make_latency
+        latency = make_latency(config)
+        rng = random.Random(1)
+        assert all(low <= latency(rng) <= high for _ in range(100))
+
+
+class TestFakePracticumWorkload:
+    def test_poller_sees_injected_faults(self, monkeypatch):
+        import homework
+        from bench.fake_api import FakePracticum
+        from bench.workload import Workload
+        from exceptions import APIThrottledError, ResponseFormatError
+        workload = Workload({'replay': [
+            {'status': 429, 'headers': {'Retry-After': '5'}},
+            {'status': 200, 'raw': '{"homeworks": ['},
+        ]})
+        server = FakePracticum(workload=workload).start()
+        monkeypatch.setattr(
+            homework, 'ENDPOINT',
+            f'{server.url}/api/user_api/homework_statuses/'
+        )
+        headers = homework.make_headers('a')
+        try:
+            with pytest.raises(APIThrottledError) as error:
+                homework.request_homework_statuses(headers, 0)
+            assert error.value.retry_after == 5
+            with pytest.raises(ResponseFormatError):
+                homework.request_homework_statuses(headers, 0)
+            response = homework.request_homework_statuses(headers, 0)
+            assert response['homeworks'][0]['homework_name'] == 'hw-a-0'
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert server.polls == {'a': 3}
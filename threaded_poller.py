@@ -0,0 +1,104 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from delivery import SendPool
+from homework import load_environment
+from log_config import setup_logging
+from metrics import (
+    ACTIVE_SUBSCRIPTIONS,
+    DELIVERY_QUEUE_DEPTH,
+    start_metrics_server,
+)
+from scheduler import Scheduler, load_runtime, poll_subscription
+from state import open_state_store
+from transport import HTTPTransport
+
+logger = logging.getLogger(__name__)
+
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 16))
+
+
+class ThreadedPoller:
+    """
+    Цикл опроса подписок на пуле потоков.
+    Блокирующие запросы к API выполняются в `ThreadPoolExecutor`
+    из `workers` потоков, порядок опроса задаёт общий `Scheduler`,
+    а результаты опросов собираются через futures.
+    Одну подписку в каждый момент опрашивает не больше одного потока.
+    """
+
+    def __init__(self, bot, scheduler, workers=POLL_WORKERS):
+        self.bot = bot
+        self.scheduler = scheduler
+        self._executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='poll'
+        )
+
+    def run_pending(self, now=None):
+        """Параллельно опрашивает подписки, срок опроса которых наступил."""
+        now = time.monotonic() if now is None else now
+        limit = self.scheduler.admit(now)
+        if limit == 0:
+            return 0
+        due_subscriptions = self.scheduler.pop_due(now, limit)
+        futures = [
+            self._executor.submit(
+                poll_subscription, self.bot, subscription,
+                self.scheduler.transport, self.scheduler.cache
+            )
+            for subscription, _ in due_subscriptions
+        ]
+        for future in as_completed(futures):
+            self.scheduler.record_result(future.result(), now)
+        for subscription, due in due_subscriptions:
+            self.scheduler.complete(subscription, due, now)
+        return len(due_subscriptions)
+
+    def run_forever(self):
+        """Бесконечный цикл опроса подписок."""
+        while True:
+            self.run_pending()
+            self.scheduler.wait()
+
+    def close(self):
+        """Дожидается начатых опросов и останавливает пул."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Запуск опроса всех подписок на пуле потоков."""
+    from telebot import TeleBot
+
+    runtime = load_runtime()
+    if runtime is None:
+        return
+    telegram_token, registry = runtime
+
+    bot = TeleBot(token=telegram_token)
+    logger.info(
+        'Запущен опрос подписок: %d, потоков: %d.', len(registry), POLL_WORKERS
+    )
+    with HTTPTransport(pool_maxsize=POLL_WORKERS) as transport:
+        with open_state_store() as store, SendPool(bot) as outbox:
+            ACTIVE_SUBSCRIPTIONS.set_function(registry.__len__)
+            DELIVERY_QUEUE_DEPTH.set_function(outbox.__len__)
+            scheduler = Scheduler(
+                outbox, registry, transport=transport, store=store
+            )
+            with ThreadedPoller(outbox, scheduler) as poller:
+                poller.run_forever()
+
+
+if __name__ == '__main__':
+    load_environment()
+    setup_logging()
+    start_metrics_server()
+    main()
@@ -0,0 +1,151 @@
+import collections
+import contextvars
+import json
+import os
+import threading
+import time
+
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER')
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 10000))
+
+_subscription = contextvars.ContextVar('subscription', default=None)
+_stage = contextvars.ContextVar('stage', default=None)
+
+
+def current_subscription():
+    """Возвращает идентификатор подписки, которая сейчас опрашивается."""
+    return _subscription.get()
+
+
+def current_stage():
+    """Возвращает название текущего этапа конвейера опроса."""
+    return _stage.get()
+
+
+class RingBufferExporter:
+    """Хранит последние `capacity` спанов в памяти."""
+
+    def __init__(self, capacity=TRACE_BUFFER_SIZE):
+        self.spans = collections.deque(maxlen=capacity)
+
+    def export(self, span):
+        """Сохраняет спан."""
+        self.spans.append(span)
+
+
+class JsonLinesExporter:
+    """Дописывает спаны в файл, по одному JSON-объекту на строку."""
+
+    def __init__(self, path=TRACE_FILE):
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        """Записывает спан в файл."""
+        line = json.dumps(span, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        """Закрывает файл."""
+        with self._lock:
+            self._file.close()
+
+
+class _Stage:
+    """Отмечает текущий этап конвейера, не записывая спан."""
+
+    __slots__ = ('_name', '_token')
+
+    def __init__(self, name):
+        self._name = name
+
+    def __enter__(self):
+        self._token = _stage.set(self._name)
+        return self
+
+    def __exit__(self, *exc_info):
+        _stage.reset(self._token)
+        return False
+
+
+class _Span(_Stage):
+    __slots__ = ('_exporter', '_started')
+
+    def __init__(self, exporter, name):
+        super().__init__(name)
+        self._exporter = exporter
+
+    def __enter__(self):
+        super().__enter__()
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        finished = time.monotonic()
+        super().__exit__()
+        self._exporter.export({
+            'name': self._name,
+            'subscription': _subscription.get(),
+            'start': self._started,
+            'duration': finished - self._started,
+            'outcome': 'ok' if exc_type is None else 'error',
+            'error': None if exc_type is None else exc_type.__name__,
+        })
+        return False
+
+
+class _SubscriptionContext:
+    __slots__ = ('_subscription_id', '_token')
+
+    def __init__(self, subscription_id):
+        self._subscription_id = subscription_id
+
+    def __enter__(self):
+        self._token = _subscription.set(self._subscription_id)
+        return self
+
+    def __exit__(self, *exc_info):
+        _subscription.reset(self._token)
+        return False
+
+
+class Tracer:
+    """
+    Трассировка этапов конвейера опроса.
+    Каждый этап оборачивается в спан с монотонным временем начала,
+    длительностью, исходом и идентификатором подписки. Без экспортёра
+    спаны не записываются, а только отмечают текущие подписку и этап:
+    их добавляет к записям журнала `log_config`.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    def set_exporter(self, exporter):
+        """Задаёт экспортёр; None выключает трассировку."""
+        self.exporter = exporter
+
+    def span(self, name):
+        """Возвращает контекстный менеджер спана этапа `name`."""
+        exporter = self.exporter
+        if exporter is None:
+            return _Stage(name)
+        return _Span(exporter, name)
+
+    def subscription(self, subscription_id):
+        """Привязывает вложенные спаны и записи журнала к подписке."""
+        return _SubscriptionContext(subscription_id)
+
+
+def exporter_from_env(name=TRACE_EXPORTER):
+    """Функция создаёт экспортёр по значению TRACE_EXPORTER."""
+    if name == 'jsonl':
+        return JsonLinesExporter()
+    if name == 'memory':
+        return RingBufferExporter()
+    return None
+
+
+TRACER = Tracer(exporter_from_env())
@@ -0,0 +1,99 @@
+import os
+import time
+
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '1') != '0'
+KEEP_ALIVE = os.getenv('HTTP_KEEP_ALIVE', '1') != '0'
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value):
+    """
+    Функция переводит заголовок `Retry-After` в секунды.
+    Заголовок может содержать число секунд или HTTP-дату.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - time.time(), 0)
+
+
+class HTTPTransport:
+    """
+    Долгоживущая HTTP-сессия с пулом соединений.
+    `pool_maxsize` ограничивает число соединений к одному хосту,
+    `pool_connections` - число хостов, пулы которых держатся открытыми.
+    `requests` импортируется при создании первого транспорта.
+    """
+
+    def __init__(
+        self,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK,
+        keep_alive=KEEP_ALIVE,
+        timeout=TIMEOUT,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def get(self, url, **kwargs):
+        """Выполняет GET-запрос через пул соединений."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def stats(self):
+        """
+        Возвращает счётчики пула соединений.
+        `requests` - число запросов, `connections` - число открытых
+        соединений, `reused` - запросы на уже открытом соединении.
+        """
+        pools = self._adapter.poolmanager.pools
+        requests_count = connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': requests_count - connections,
+        }
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()